@@ -0,0 +1,95 @@
+"""Compares the time a Google Scholar page takes to be ready in the default browser and in the lean browser.
+
+A page is ready when the element read by its parser is present. For each profile and page, it reports the best and
+median ready time and the bytes transferred, as reported by the Resource Timing API of the browser. It needs
+geckodriver and sends real requests to Google Scholar, so keep the repeats low:
+
+    python -m benchmarks.browser <geckodriver> [--user ID] [--repeat N] [--cache-dir DIR] [page ...]
+
+The profile page is loaded only when a Google Scholar user id is given.
+
+"""
+
+# Python imports
+import argparse
+from statistics import median
+from time import perf_counter, sleep
+
+# Vendor imports
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Crosscholar modules imports
+import benchmarks.environment  # noqa: F401 (puts the crosscholar modules in the path)
+from browsers import firefox
+
+# The pages loaded and the element that makes each one ready
+PAGES = {
+    'search_authors': ("https://scholar.google.com/citations?hl=en&view_op=search_authors&mauthors=physics",
+                       'gsc_sa_ccl'),
+    'profile': ("https://scholar.google.com/citations?hl=en&oe=ASCII&user=<user>", 'gsc_bpf_more'),
+    'search_results': ("https://scholar.google.com/scholar?hl=en&as_sdt=0%2C5&q=deep+learning&btnG=",
+                       'gs_res_ccl_mid'),
+}
+
+# The browser started by crosscholar before and after the lean settings
+PROFILES = {
+    'default': {},
+    'lean': {'headless': True, 'block': ('images', 'styles', 'fonts'), 'page_load_strategy': 'eager'},
+}
+
+TRANSFERRED = """
+return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))
+    .reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+def ready_time(browser, url: str, element: str) -> float:
+    start = perf_counter()
+    browser.get(url)
+    WebDriverWait(browser, 30).until(EC.presence_of_element_located((By.ID, element)))
+
+    return perf_counter() - start
+
+
+def measure(driver: str, settings: dict, url: str, element: str, repeat: int, cache_dir: str = None) -> dict:
+    browser = firefox(driver, cache_dir=cache_dir, **settings)
+
+    times, transferred = [], []
+    try:
+        for _ in range(repeat):
+            times.append(ready_time(browser, url, element))
+            transferred.append(browser.execute_script(TRANSFERRED))
+            sleep(2)  # not too fast for Google Scholar
+    finally:
+        browser.quit()
+
+    return {'best': min(times), 'median': median(times), 'transferred': median(transferred)}
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument('driver', help="path of geckodriver")
+    arguments.add_argument('pages', nargs='*', help=f"pages to load: {', '.join(PAGES)}, all by default")
+    arguments.add_argument('--user', help="Google Scholar user id of the profile page")
+    arguments.add_argument('--repeat', type=int, default=3, help="loads by page and profile, 3 by default")
+    arguments.add_argument('--cache-dir', help="disk cache shared by the lean browsers, none by default")
+    options = arguments.parse_args()
+
+    pages = options.pages if options.pages else [name for name in PAGES if name != 'profile' or options.user]
+
+    print(f"{'page':<18}{'profile':<10}{'best ms':>10}{'median ms':>11}{'KiB':>10}")
+
+    for name in pages:
+        url, element = PAGES[name]
+        url = url.replace('<user>', options.user or '')
+        for profile, settings in PROFILES.items():
+            cache_dir = options.cache_dir if profile == 'lean' else None
+            result = measure(options.driver, settings, url, element, options.repeat, cache_dir)
+            print(f"{name:<18}{profile:<10}{result['best'] * 1000:>10.0f}{result['median'] * 1000:>11.0f}"
+                  f"{result['transferred'] / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Helpers to import the crosscholar modules from the benchmarks."""
+
+# Python imports
+import sys
+from os import chdir
+from os.path import abspath, dirname, join
+from tempfile import mkdtemp
+
+ROOT = join(dirname(abspath(__file__)), '..', 'crosscholar')
+
+# The crosscholar modules import each other by their module name
+for directory in ('models', 'library', ''):
+    path = abspath(join(ROOT, directory))
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+CONFIGURATION = """
+download_dir = '{download_dir}/'
+driver_dir = '{driver_dir}'
+
+[crossref]
+enabled = false
+
+[cache]
+enabled = false
+
+[notify]
+enabled = false
+"""
+
+
+def load_crosscholar(driver_dir: str = ''):
+    """Imports the crosscholar module with a configuration that sends nothing anywhere.
+
+    The module reads `crosscholar.toml` from the working directory when it's imported, so the working directory is
+    changed to a temporary one with a minimal configuration.
+
+    Returns
+    -------
+    module
+        The crosscholar module.
+
+    """
+
+    working_dir = mkdtemp(prefix='crosscholar_bench_')
+
+    with open(join(working_dir, 'crosscholar.toml'), 'w', encoding='utf-8') as file:
+        file.write(CONFIGURATION.format(download_dir=working_dir.replace('\\', '/'),
+                                        driver_dir=driver_dir.replace('\\', '/')))
+
+    chdir(working_dir)
+
+    import crosscholar
+    return crosscholar
@@ -0,0 +1,202 @@
+"""Generates the offline corpus of Google Scholar pages used by the parser benchmarks.
+
+The pages reproduce the markup parsed by crosscholar (ids, classes and attributes) with deterministic fake data, and
+include inline scripts and styles of a similar size to the real ones, so the parsers do the same work they do on a
+live page. Run it again only if the markup of Google Scholar changes:
+
+    python benchmarks/fixtures/generate.py
+
+"""
+
+# Python imports
+import gzip
+import json
+from html import escape
+from os.path import dirname, join
+from random import Random
+
+FIXTURES = dirname(__file__)
+
+WORDS = ("energy", "climate", "change", "mitigation", "carbon", "dioxide", "emissions", "analysis", "steel", "iron",
+         "industry", "mexico", "model", "decomposition", "index", "efficiency", "policy", "urban", "water", "seismic",
+         "structural", "response", "soil", "dynamic", "evaluation", "renewable", "solar", "wind", "power", "systems",
+         "optimization", "network", "transport", "sustainable", "development", "assessment", "risk", "hazard",
+         "earthquake", "concrete", "buildings", "hydraulic", "flow", "sediment", "river", "basin", "groundwater",
+         "logarithmic", "mean", "divisia", "uncertainty", "simulation", "numerical", "experimental", "study")
+NAMES = ("García", "López", "Martínez", "Hernández", "González", "Pérez", "Sánchez", "Ramírez", "Cruz", "Flores",
+         "Smith", "Johnson", "Brown", "Müller", "Nguyen", "Chen", "Wang", "Kumar", "Silva", "Rossi")
+GIVEN = ("Claudia", "Eric", "José", "María", "Luis", "Ana", "Juan", "Sofía", "Carlos", "Lucía", "John", "Wei")
+JOURNALS = ("Energy Policy", "Applied Energy", "Journal of Cleaner Production", "Earthquake Spectra",
+            "Renewable and Sustainable Energy Reviews", "Water Resources Research", "Engineering Structures")
+
+
+def title(rng: Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(5, 18))]
+    return (' '.join(words)).capitalize() + (": " + rng.choice(WORDS) if rng.random() < 0.2 else '')
+
+
+def authors(rng: Random) -> str:
+    return ', '.join(f"{rng.choice(GIVEN)[0]} {rng.choice(NAMES)}" for _ in range(rng.randint(1, 6)))
+
+
+def user_id(rng: Random) -> str:
+    return ''.join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_") for _ in range(12))
+
+
+def noise(rng: Random, size: int) -> str:
+    """Inline script and style blocks like the ones in every Google Scholar page."""
+
+    rules = ''.join(f".gs_{rng.randint(0, 9999)}{{margin:{rng.randint(0, 16)}px;color:#{rng.randint(0, 0xffffff):06x}}}"
+                    for _ in range(size // 40))
+    script = ''.join(f"var gs_{rng.randint(0, 9999)}=function(a){{return a+{rng.randint(0, 99)}}};"
+                     for _ in range(size // 40))
+    return f"<style>{rules}</style><script>{script}</script>"
+
+
+def page(rng: Random, body: str) -> str:
+    return (f"<!doctype html><html><head><title>Google Scholar</title>{noise(rng, 30000)}</head>"
+            f"<body><div id=\"gs_top\">{body}</div>{noise(rng, 8000)}</body></html>")
+
+
+def search_authors(rng: Random, count: int = 10) -> str:
+    users = []
+    for _ in range(count):
+        uid = user_id(rng)
+        name = f"{rng.choice(GIVEN)} {rng.choice(NAMES)}"
+        users.append(
+            f"<div class=\"gsc_1usr gs_scl\">"
+            f"<div class=\"gsc_1usr_photo\"><a href=\"/citations?user={uid}&amp;hl=en\">"
+            f"<img src=\"/citations?view_op=small_photo&amp;user={uid}&amp;citpid=1\" alt=\"{name}\"></a></div>"
+            f"<div class=\"gsc_oai\"><h3 class=\"gsc_oai_name\"><a href=\"/citations?user={uid}&amp;hl=en\">"
+            f"{name}</a></h3>"
+            f"<div class=\"gsc_oai_aff\">Instituto de Ingeniería, <span class=\"gs_hlt\">UNAM</span></div>"
+            f"<div class=\"gsc_oai_eml\">Verified email at iingen.unam.mx</div>"
+            f"<div class=\"gsc_oai_cby\">Cited by {rng.randint(0, 20000)}</div>"
+            f"<div class=\"gsc_oai_int\"><a class=\"gsc_oai_one_int\" href=\"/citations?view_op=search_authors"
+            f"&amp;hl=en&amp;mauthors=label:energy\">Energy</a></div></div></div>")
+
+    after = user_id(rng)
+    onclick = ("window.location='\\x2Fcitations\\x3Fview_op\\x3Dsearch_authors\\x26hl\\x3Den\\x26mauthors\\x3Dunam"
+               f"\\x26after_author\\x3D{after}\\x26astart\\x3D10'")
+    pagination = (f"<div id=\"gsc_authors_bottom_pag\"><span class=\"gs_nph\">"
+                  f"<button type=\"button\" aria-label=\"Previous\" disabled>Previous</button>"
+                  f"<button type=\"button\" onclick=\"{escape(onclick)}\" aria-label=\"Next\">Next</button>"
+                  f"</span></div>")
+
+    return page(rng, f"<div id=\"gsc_sa_ccl\">{''.join(users)}</div>{pagination}")
+
+
+def profile(rng: Random, works: int) -> str:
+    uid = user_id(rng)
+    years = range(2005, 2019)
+    graph = ''.join(f"<span class=\"gsc_g_t\" style=\"right:{i * 32}px\">{year}</span>"
+                    for i, year in enumerate(years))
+    graph += ''.join(f"<a href=\"javascript:void(0)\" class=\"gsc_g_a\" style=\"right:{i * 32}px\">"
+                     f"<span class=\"gsc_g_al\">{rng.randint(0, 900)}</span></a>" for i, _ in enumerate(years))
+
+    rows = []
+    for _ in range(works):
+        citation = f"{uid}:{user_id(rng)}"
+        cites = rng.randint(10 ** 17, 10 ** 19)
+        count = rng.randint(0, 1500) if rng.random() < 0.8 else 0
+        year = rng.choice(years)
+        cited = (f"<a href=\"https://scholar.google.com/scholar?oi=bibs&amp;hl=en&amp;oe=ASCII&amp;cites={cites}\" "
+                 f"class=\"gsc_a_ac gs_ibl\">{count}</a>") if count else "<a href=\"\" class=\"gsc_a_ac gs_ibl\"></a>"
+        rows.append(
+            f"<tr class=\"gsc_a_tr\"><td class=\"gsc_a_t\">"
+            f"<a href=\"javascript:void(0)\" data-href=\"/citations?view_op=view_citation&amp;hl=en&amp;oe=ASCII"
+            f"&amp;user={uid}&amp;pagesize=100&amp;citation_for_view={citation}\" class=\"gsc_a_at\">"
+            f"{escape(title(rng))}</a>"
+            f"<div class=\"gs_gray\">{authors(rng)}</div>"
+            f"<div class=\"gs_gray\">{rng.choice(JOURNALS)} {rng.randint(1, 120)} ({rng.randint(1, 12)}), "
+            f"{rng.randint(1, 900)}-{rng.randint(901, 1800)}<span class=\"gs_oph\">, {year}</span></div></td>"
+            f"<td class=\"gsc_a_c\">{cited}<span class=\"gsc_a_m\"></span></td>"
+            f"<td class=\"gsc_a_y\"><span class=\"gsc_a_h gsc_a_hc gs_ibl\">{year}</span></td></tr>")
+
+    body = (f"<div id=\"gsc_prf_w\"><div id=\"gsc_prf_in\">{rng.choice(GIVEN)} {rng.choice(NAMES)}</div></div>"
+            f"<div id=\"gsc_md_hist\"><div class=\"gsc_md_hist_b\">{graph}</div></div>"
+            f"<table id=\"gsc_a_t\"><thead><tr id=\"gsc_a_tr0\"><th class=\"gsc_a_t\">Title</th>"
+            f"<th class=\"gsc_a_c\">Cited by</th><th class=\"gsc_a_y\">Year</th></tr></thead>"
+            f"<tbody id=\"gsc_a_b\">{''.join(rows)}</tbody></table>"
+            f"<button type=\"button\" id=\"gsc_bpf_more\" class=\"gs_btnPD\" disabled>Show more</button>")
+
+    return page(rng, body)
+
+
+def citation(rng: Random, patent: bool = False) -> str:
+    fields = [('Inventors' if patent else 'Authors', authors(rng)), ('Publication date', '2014/6/1')]
+    if patent:
+        fields += [('Patent office', 'US'), ('Patent number', str(rng.randint(10 ** 6, 10 ** 7)))]
+    else:
+        fields += [('Journal', rng.choice(JOURNALS)), ('Volume', str(rng.randint(1, 120))),
+                   ('Issue', str(rng.randint(1, 12))), ('Pages', f"{rng.randint(1, 900)}-{rng.randint(901, 1800)}"),
+                   ('Publisher', 'Elsevier')]
+    fields.append(('Description', ' '.join(rng.choice(WORDS) for _ in range(120))))
+
+    years = range(2014, 2019)
+    graph = ''.join(f"<span class=\"gsc_vcd_g_t\" style=\"left:{i * 32}px\">{year}</span>"
+                    for i, year in enumerate(years))
+    graph += ''.join(f"<a href=\"https://scholar.google.com/scholar?oi=bibs&amp;cites=1&amp;as_ylo={year}\" "
+                     f"class=\"gsc_vcd_g_a\" style=\"left:{i * 32}px\"><span class=\"gsc_vcd_g_al\">"
+                     f"{rng.randint(1, 90)}</span></a>" for i, year in enumerate(years))
+    total = (f"<div style=\"margin-bottom:1em\"><a href=\"https://scholar.google.com/scholar?cites=1\">"
+             f"Cited by {rng.randint(1, 500)}</a></div><div id=\"gsc_vcd_graph_bars\">{graph}</div>")
+
+    rows = ''.join(f"<div class=\"gs_scl\"><div class=\"gsc_vcd_field\">{field}</div>"
+                   f"<div class=\"gsc_vcd_value\">{escape(value)}</div></div>" for field, value in fields)
+    rows += (f"<div class=\"gs_scl\"><div class=\"gsc_vcd_field\">Total citations</div>"
+             f"<div class=\"gsc_vcd_value\">{total}</div></div>")
+
+    body = (f"<div id=\"gs_md_cita-d\"><div id=\"gsc_vcd_title\"><a class=\"gsc_vcd_title_link\" href=\"#\">"
+            f"{escape(title(rng))}</a></div><div id=\"gsc_vcd_table\">{rows}</div></div>")
+
+    return page(rng, body)
+
+
+def search_results(rng: Random, searched: str, count: int = 10, match: int = 3) -> str:
+    results = []
+    for index in range(count):
+        text = searched if index == match else title(rng)
+        tag = "<span class=\"gs_ctg2\">[PDF]</span> " if rng.random() < 0.3 else ''
+        wos = (f"<a href=\"http://gateway.webofknowledge.com/gateway/Gateway.cgi?GWVersion=2&amp;KeyUT={index}\" "
+               f"class=\"gs_nta gs_nph\">Web of Science: {rng.randint(1, 300)}</a>") if rng.random() < 0.7 else ''
+        results.append(
+            f"<div class=\"gs_r gs_or gs_scl\" data-cid=\"{user_id(rng)}\"><div class=\"gs_ri\">"
+            f"<h3 class=\"gs_rt\">{tag}<a href=\"https://example.org/{index}\">{escape(text)}</a></h3>"
+            f"<div class=\"gs_a\">{authors(rng)} - {rng.choice(JOURNALS)}, 2014 - Elsevier</div>"
+            f"<div class=\"gs_rs\">{' '.join(rng.choice(WORDS) for _ in range(40))}</div>"
+            f"<div class=\"gs_fl\"><a href=\"/scholar?cites=1\">Cited by {rng.randint(1, 500)}</a> "
+            f"<a href=\"/scholar?q=related:1\">Related articles</a> {wos}</div></div></div>")
+
+    return page(rng, f"<div id=\"gs_res_ccl\"><div id=\"gs_res_ccl_mid\">{''.join(results)}</div></div>")
+
+
+def main() -> None:
+    rng = Random(20181009)
+    searched = title(rng)
+
+    pages = {
+        'search_authors': (['gsc_users'], search_authors(rng), {'users': 10}),
+        'profile_small': (['gsc_user_citations_graph', 'gsc_works'], profile(rng, 20), {'works': 20}),
+        'profile_medium': (['gsc_user_citations_graph', 'gsc_works'], profile(rng, 100), {'works': 100}),
+        'profile_large': (['gsc_user_citations_graph', 'gsc_works'], profile(rng, 1200), {'works': 1200}),
+        'citation_article': (['gsc_work_details', 'gsc_work_citations_graph'], citation(rng), {'works': 1}),
+        'citation_patent': (['gsc_work_details', 'gsc_work_citations_graph'], citation(rng, patent=True),
+                            {'works': 1}),
+        'search_results': (['gsc_search_wos_citations'], search_results(rng, searched), {'works': 1,
+                                                                                         'title': searched}),
+    }
+
+    corpus = {}
+    for name, (parsers, html_, meta) in pages.items():
+        with gzip.GzipFile(join(FIXTURES, f"{name}.html.gz"), 'wb', mtime=0) as file:
+            file.write(html_.encode('utf-8'))
+        corpus[name] = dict(parsers=parsers, file=f"{name}.html.gz", **meta)
+
+    with open(join(FIXTURES, 'corpus.json'), 'w', encoding='utf-8') as file:
+        json.dump(corpus, file, indent=4, ensure_ascii=False)
+        file.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Benchmarks the Google Scholar parsers against the offline corpus in benchmarks/fixtures.
+
+For each page and parser, it reports the best and median time to build the soup and parse it, the time per work and
+the peak memory allocated while parsing. By default the soups are built as crosscholar builds them; --full builds the
+whole document with html.parser, as crosscholar did before the parsing layer, to compare both:
+
+    python -m benchmarks.parsers [--repeat N] [--full] [page ...]
+
+"""
+
+# Python imports
+import argparse
+import gzip
+import json
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import dirname, join
+from statistics import median
+from time import perf_counter
+
+# Crosscholar modules imports
+from benchmarks.environment import load_crosscholar
+
+FIXTURES = join(dirname(__file__), 'fixtures')
+
+# The subtree built for each parser
+TARGETS = {
+    'gsc_users': 'users',
+    'gsc_user_citations_graph': 'graph',
+    'gsc_works': 'works',
+    'gsc_work_details': 'details',
+    'gsc_work_citations_graph': 'details',
+    'gsc_search_wos_citations': 'results',
+}
+
+cc = load_crosscholar()
+
+
+def read_corpus() -> dict:
+    with open(join(FIXTURES, 'corpus.json'), encoding='utf-8') as file:
+        corpus = json.load(file)
+
+    for page in corpus.values():
+        with gzip.open(join(FIXTURES, page['file']), 'rb') as file:
+            page['html'] = file.read()
+
+    return corpus
+
+
+def user() -> 'cc.User':
+    return cc.User('BENCHMARK', 'Benchmark User',
+                   cc.URLFactory(type_=cc.ScholarURLType.CITATIONS_USER,
+                                 url=cc.ScholarURLType.BASE.value + "/citations?user=BENCHMARK&hl=en"))
+
+
+def parse(parser: str, page: dict, full: bool = False):
+    """Builds the soup of a page and runs a parser over it, returning the parsed output."""
+
+    if full:
+        soup = cc.make_soup(page['html'], backend='html.parser')
+    else:
+        soup = cc.make_soup(page['html'], TARGETS[parser])
+
+    if parser == 'gsc_users':
+        return cc.gsc_users(soup)
+
+    if parser == 'gsc_user_citations_graph':
+        u = user()
+        cc.gsc_user_citations_graph(soup, u)
+        return u['citations_per_year']
+
+    if parser == 'gsc_works':
+        return list(cc.gsc_works(soup, user()))
+
+    if parser == 'gsc_work_details':
+        w = cc.Work()
+        cc.gsc_work_details(soup, w)
+        return w
+
+    if parser == 'gsc_work_citations_graph':
+        return cc.gsc_work_citations_graph(soup)
+
+    if parser == 'gsc_search_wos_citations':
+        w = cc.Work(gsc_title=page['title'])
+        cc.gsc_search_wos_citations(soup, w)
+        return w
+
+    raise ValueError(f"Unknown parser: {parser}")
+
+
+def measure(parser: str, page: dict, repeat: int, full: bool = False) -> dict:
+    with redirect_stdout(StringIO()):  # the parsers print their progress
+        return _measure(parser, page, repeat, full)
+
+
+def _measure(parser: str, page: dict, repeat: int, full: bool) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        parse(parser, page, full)
+        times.append(perf_counter() - start)
+
+    tracemalloc.start()
+    parse(parser, page, full)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    works = page.get('works', page.get('users', 1))
+
+    return {'best': min(times), 'median': median(times), 'per_work': median(times) / works, 'peak': peak}
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument('pages', nargs='*', help="pages of the corpus to benchmark, all by default")
+    arguments.add_argument('--repeat', type=int, default=5, help="runs by page and parser, 5 by default")
+    arguments.add_argument('--full', action='store_true', help="build the whole documents with html.parser")
+    options = arguments.parse_args()
+
+    corpus = read_corpus()
+    pages = options.pages if options.pages else list(corpus)
+
+    print(f"{'page':<18}{'parser':<28}{'KiB':>8}{'best ms':>10}{'median ms':>11}{'ms/work':>10}{'peak KiB':>10}")
+
+    for name in pages:
+        page = corpus[name]
+        for parser in page['parsers']:
+            result = measure(parser, page, options.repeat, options.full)
+            print(f"{name:<18}{parser:<28}{len(page['html']) / 1024:>8.0f}{result['best'] * 1000:>10.2f}"
+                  f"{result['median'] * 1000:>11.2f}{result['per_work'] * 1000:>10.3f}{result['peak'] / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
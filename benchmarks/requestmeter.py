@@ -0,0 +1,76 @@
+"""Stress test of the Requestmeter counting from many threads at the same time.
+
+Every thread counts the same number of requests, as fast as it can. At the end, the total and the requests in the
+last hour must be exactly the requests counted, i.e., no increment is lost. It reports the wall time per count, in
+nanoseconds, with a single thread and with all of them (the threads share the interpreter, so it's the cost of a count
+added to the program, not the latency seen by each thread):
+
+    python -m benchmarks.requestmeter [--threads N] [--counts N] [--listened]
+
+--listened subscribes a handler to the speed limit events, which must not slow the counts down: the events are raised
+when the meter is read, not when the requests are counted.
+
+"""
+
+# Python imports
+import argparse
+from threading import Barrier, Thread
+from time import perf_counter_ns
+
+# Crosscholar modules imports
+import benchmarks.environment  # noqa: F401 (puts the crosscholar modules in the path)
+from timer import Requestmeter
+
+
+def hammer(meter: Requestmeter, counts: int, barrier: Barrier) -> None:
+    barrier.wait()
+
+    for _ in range(counts):
+        meter.count()
+
+
+def run(threads: int, counts: int, listened: bool) -> dict:
+    meter = Requestmeter((10 ** 9, 10 ** 9, 10 ** 9))  # limits never reached
+    if listened:
+        meter.events.s_speed_limit_exceeded += lambda excess: None
+
+    start = []
+    barrier = Barrier(threads, action=lambda: start.append(perf_counter_ns()))
+    workers = [Thread(target=hammer, args=(meter, counts, barrier)) for _ in range(threads)]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    elapsed = perf_counter_ns() - start[0]
+    expected = threads * counts
+
+    return {'expected': expected, 'total': meter.total_requests, 'hour': meter.requests_last_hour(),
+            'ns': elapsed / expected}
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument('--threads', type=int, default=32, help="threads counting at the same time, 32 by default")
+    arguments.add_argument('--counts', type=int, default=100000, help="counts by thread, 100000 by default")
+    arguments.add_argument('--listened', action='store_true', help="listen to the speed limit events")
+    options = arguments.parse_args()
+
+    print(f"{'threads':>8}{'counts':>12}{'total':>12}{'last hour':>12}{'lost':>8}{'ns/count':>10}")
+
+    failed = False
+    for threads in (1, options.threads):
+        result = run(threads, options.counts, options.listened)
+        lost = result['expected'] - min(result['total'], result['hour'])
+        failed = failed or lost != 0
+
+        print(f"{threads:>8}{result['expected']:>12}{result['total']:>12}{result['hour']:>12}{lost:>8}"
+              f"{result['ns']:>10.0f}")
+
+    if failed:
+        raise SystemExit("Some requests were lost")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Replays synthetic request traces against the speed limits on a virtual clock.
+
+A trace is the times, to the millisecond, at which the scraper wants to send its requests. Each limiter delays the
+requests until its speed limits permit them, and a Requestmeter on the same virtual time counts them when they are sent,
+so hours of scraping take a moment and every run gives the same numbers. For each trace and limiter it reports:
+
+- the throughput: requests sent per second, from the first request wanted to the last one sent
+- the violations: requests sent above the limit of a sliding second, minute and hour
+- the wait imposed on the requests: total and longest
+
+    python -m benchmarks.simulate [--limits S M H] [--trace NAME ...] [--limiter NAME ...] [--seed N]
+
+"""
+
+# Python imports
+import argparse
+from random import Random
+from time import perf_counter
+from typing import List, Tuple
+
+# Crosscholar modules imports
+import benchmarks.environment  # noqa: F401 (puts the crosscholar modules in the path)
+from clock import VirtualClock
+from ratelimit import ALGORITHMS
+from timer import Requestmeter, time_units
+
+
+# region Traces
+def burst(seed: int) -> List[int]:
+    """Bursts of 30 requests, 10 ms apart, every 5 minutes for an hour: a profile opened after a pause."""
+
+    return [start + 10 * request for start in range(0, 3600000, 300000) for request in range(30)]
+
+
+def steady(seed: int) -> List[int]:
+    """A request every 2 seconds for an hour: the scraper working faster than the minute limit allows."""
+
+    return list(range(0, 3600000, 2000))
+
+
+def long(seed: int) -> List[int]:
+    """Ten hours of random requests, 9 a minute on average: a batch right at the default minute and hour limits."""
+
+    random = Random(seed)
+    trace, time = [], 0.0
+    while time < 36000:
+        time += random.expovariate(9 / 60)
+        trace.append(round(time * 1000))
+
+    return trace
+
+
+TRACES = {'burst': burst, 'steady': steady, 'long': long}
+# endregion Traces
+
+
+# region Limiters
+class Unlimited:
+    """Sends every request when it's wanted, the baseline of the violations."""
+
+    def __init__(self, limits: Tuple[int, int, int], clock: VirtualClock):
+        pass
+
+    @staticmethod
+    def reserve() -> float:
+        return 0.0
+
+
+LIMITERS = {'none': Unlimited, **ALGORITHMS}
+# endregion Limiters
+
+
+def simulate(trace: List[int], limiter_class, limits: Tuple[int, int, int]) -> dict:
+    clock = VirtualClock()
+    limiter = limiter_class(limits, clock)
+
+    # The requests are wanted in the order of the trace, each one reserves its place in the limits when it's wanted
+    sent, waits = [], []
+    for wanted in trace:
+        clock.set(max(clock.time, wanted / 1000))
+        delay = limiter.reserve()
+        sent.append(clock.time + delay)
+        waits.append(delay)
+
+    meter_clock = VirtualClock(trace[0] / 1000)
+    meter = Requestmeter(limits, clock=meter_clock)
+
+    violations = [0, 0, 0]
+    for index, event in enumerate((meter.events.s_speed_limit_exceeded, meter.events.m_speed_limit_exceeded,
+                                   meter.events.h_speed_limit_exceeded)):
+        event += lambda excess, index=index: violations.__setitem__(index, violations[index] + 1)
+
+    meter.start()
+    for time in sorted(sent):
+        meter_clock.set(time)
+        meter.count()
+    meter.finish()
+    peaks = meter.peaks  # the requests are merged when the meter is read, raising the events
+
+    return {'requests': meter.total_requests, 'elapsed': meter.timer.elapsed, 'rps': meter.requests_per_second(),
+            'violations': violations, 'peaks': peaks, 'wait': sum(waits), 'max_wait': max(waits)}
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument('--limits', type=int, nargs=3, default=(2, 9, 540), metavar=('S', 'M', 'H'),
+                           help="requests per second, minute and hour, 2 9 540 by default")
+    arguments.add_argument('--trace', nargs='+', choices=TRACES, default=list(TRACES), help="traces replayed")
+    arguments.add_argument('--limiter', nargs='+', choices=LIMITERS, default=list(LIMITERS), help="limiters compared")
+    arguments.add_argument('--seed', type=int, default=0, help="seed of the random traces, 0 by default")
+    options = arguments.parse_args()
+    limits = tuple(options.limits)
+
+    print(f"{'trace':<8}{'limiter':<16}{'requests':>9}{'virtual time':>14}{'rps':>8}{'violations s/m/h':>19}"
+          f"{'peaks s/m/h':>16}{'wait (s)':>11}{'max wait':>10}{'wall ms':>9}")
+
+    for trace_name in options.trace:
+        trace = TRACES[trace_name](options.seed)
+
+        for limiter_name in options.limiter:
+            start = perf_counter()
+            result = simulate(trace, LIMITERS[limiter_name], limits)
+            wall = (perf_counter() - start) * 1000
+
+            seconds, minutes, hours = time_units(int(result['elapsed']))
+            print(f"{trace_name:<8}{limiter_name:<16}{result['requests']:>9}"
+                  f"{f'{hours}:{minutes:02}:{seconds:02}':>14}{result['rps']:>8.3f}"
+                  f"{'/'.join(map(str, result['violations'])):>19}{'/'.join(map(str, result['peaks'])):>16}"
+                  f"{result['wait']:>11.0f}{result['max_wait']:>10.1f}{wall:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
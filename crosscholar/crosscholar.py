@@ -1,79 +1,108 @@
 # Python imports
 import datetime
-from html import unescape
-from difflib import SequenceMatcher
-from re import search, sub, findall
+from re import search, findall
 from time import strftime
 from csv import reader
-from typing import List, Tuple, Dict, BinaryIO
-from time import sleep
-from math import ceil
+from typing import List, Tuple, Dict, Iterator, Iterable
+from itertools import chain
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from os import fsync, remove
+from shutil import copyfileobj
+from queue import Queue, Empty
+from threading import Event, Thread
 from os.path import basename, exists, getsize
 import traceback
+import argparse
 import smtplib
 
 # Vendor imports
-import requests
-from habanero import Crossref
 from bs4 import BeautifulSoup
+from requests import RequestException
 from selenium import webdriver
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import ElementClickInterceptedException
-from urllib.parse import quote_plus
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from urllib.parse import quote_plus, urlsplit
 
 # Crosscholar modules imports
 from urlman import URLFactory, ScholarURLType
 from scholarbase import Work, User
 from timer import Requestmeter
+from ratelimit import LimiterRegistry
 from config import Configuration
+from session import HttpSession
+from crossref import CROSSREF_FIELDS, CrossrefClient
+from cache import PersistentCache
+from pipeline import EnrichmentPipeline
+from snapshot import CrossrefSnapshot
+from browsers import BrowserPool, firefox
+from registry import WorkRegistry, work_key
+from journal import ProgressJournal
+from waits import StageWaits, rows_more_than, element_replaced, window_closed
+from similarity import similarity_engine
+from parsing import BLOCK_SCRIPT, make_soup, blocked
+from exceptions import BlockedError
+from normalize import clean_whitespace, normalize_title, normalize_result_title, normalize_person_name, title_key
 
 # Configuring app
 config = Configuration('crosscholar.toml')
 
-# region Adaptive Request Rate
-requestmeter = Requestmeter(config.limits)
-pause = False  # This flag will slow down the request speed
+# Every request takes a permit from the limiter of its host before being sent. Google Scholar is limited by the
+# general speed limits unless it has its own; the other hosts, only if they have their own
+SCHOLAR_HOST = urlsplit(ScholarURLType.BASE.value).hostname
+limiters = LimiterRegistry({SCHOLAR_HOST: config.limits, **config.hosts}, proxies=config.http['proxies'],
+                           adaptive=config.adaptive, algorithm=config.rate_limiter)
+
+# Shared connection pool for every request that doesn't go through the browser
+http = HttpSession(**config.http, limiters=limiters)
+crossref = CrossrefClient(http, config.crossref_to) if config.crossref else None
+
+# Local index of a Crossref dump, used instead of the API in snapshot mode
+crossref_snapshot = CrossrefSnapshot(config.crossref_snapshot) \
+    if config.crossref and config.crossref_mode == 'snapshot' else None
+
+# Crossref lookups already made, in this or previous runs
+crossref_cache = PersistentCache(config.cache['path'], 'crossref', config.cache['crossref_ttl'],
+                                 config.cache['max_entries']) if config.crossref and config.cache['enabled'] else None
+
+# WOS citations already searched, by work, in this or previous runs
+wos_cache = PersistentCache(config.cache['path'], 'wos', config.cache['wos_ttl'],
+                            config.cache['max_entries']) if config.cache['enabled'] else None
 
+# Minimum similarity ratios to accept a match
+SEARCH_TITLE_THRESHOLD = 0.9  # title in the profile vs title in the search results
+CRF_TITLE_THRESHOLD = 0.75  # title in the profile vs title in Crossref
+CRF_NAME_THRESHOLD = 0.69  # user name vs author name in Crossref
 
-def s_adaptive_request_rate(compensation_time):
-    global pause
-    pause = True  # Wait 'till compensation time is elapsed
-    print(f".:WAITING: {compensation_time} s:.")
-    sleep(compensation_time)
-    requestmeter.timer.elapsed_seconds += ceil(compensation_time)
-    pause = False  # Continue requesting
+similarity = similarity_engine(config.matching_engine)
+
+# region Adaptive Request Rate
+requestmeter = Requestmeter(limiters.limits[SCHOLAR_HOST])  # the requests to Google Scholar
+requestmeter.attach("Rate limits", limiters)
 
 
-def m_adaptive_request_rate(compensation_time):
-    global pause
-    print(f".:WAITING: {compensation_time} m:.")
-    compensation_time *= 60
-    pause = True  # Wait 'till compensation time is elapsed
-    sleep(compensation_time)
-    requestmeter.timer.elapsed_minutes += ceil(compensation_time / 60)
-    pause = False  # Continue requesting
+def rate_changed(budget: str, old: float, new: float, reason: str) -> None:
+    # A long run may be slowed down for hours, so each change of the adaptive rate is visible while it happens
+    print(f"!!!>>> Request rate of {budget}: {old:.2f} -> {new:.2f} of the limits ({reason})")
+    logging_collector("WARNING" if new < old else "INFO", "RATE CHANGED", [budget, f"{old:.3f} -> {new:.3f}", reason])
 
 
-def h_adaptive_request_rate(compensation_time):
-    global pause
-    print(f".:WAITING: {compensation_time} h:.")
-    compensation_time *= 3600
-    pause = True  # Wait 'till compensation time is elapsed
-    sleep(compensation_time)
-    requestmeter.timer.elapsed_hours += ceil(compensation_time / 3600)
-    pause = False  # Continue requesting
+limiters.events.rate_changed += rate_changed
 
+if crossref_cache is not None:
+    requestmeter.attach("Crossref cache", crossref_cache)
 
-# Event subscriptions
-requestmeter.events.s_speed_limit_exceeded = s_adaptive_request_rate
-requestmeter.events.m_speed_limit_exceeded = m_adaptive_request_rate
-requestmeter.events.h_speed_limit_exceeded = h_adaptive_request_rate
+if wos_cache is not None:
+    requestmeter.attach("WOS cache", wos_cache)
 
+# The browser waits for the page events instead of sleeping a fixed time; the time waited is reported by stage
+waits = StageWaits(timeout=10)
+requestmeter.attach("Browser waits", waits)
 
 # endregion Adaptive Request Rate
 
+
 # region Scraper functions
 def gsc_users(soup: BeautifulSoup) -> List[User]:
     """Parses the Google Scholar citations view.
@@ -194,9 +223,10 @@ def gsc_work_citations_graph(soup: BeautifulSoup) -> Dict:
         return citations_per_year
 
 
-def gsc_user_works(soup: BeautifulSoup, user: User, file: BinaryIO, browser: webdriver = None,
-                   start_in_work: int = None) -> int:
-    """Parses the Google Scholar citations per user page.
+def gsc_user_works(works: Iterable[Work], user: User, pipeline: EnrichmentPipeline, browser: webdriver = None,
+                   candidates: List[Tuple[str, dict]] = None, registry: WorkRegistry = None,
+                   journal: ProgressJournal = None) -> int:
+    """Completes the works listed in the Google Scholar citations per user page.
 
     This view shows a list of the documents of a specific author (user) and the citations graph
     for that user.
@@ -206,21 +236,28 @@ def gsc_user_works(soup: BeautifulSoup, user: User, file: BinaryIO, browser: web
 
     Parameters
     ----------
-    soup : BeautifulSoup
-        The HTML soup for the citations/user page (documents) for a particular user (author) that this function will
-        parse.
+    works : iterable
+        The works parsed from the citations/user page (documents) for a particular user (author), as returned by
+        `user_works`.
 
     user : User
         The user related to these documents.
 
-    file : object
-        The file object where the program will write the results.
+    pipeline : EnrichmentPipeline
+        The enrichment stage that completes the works with Crossref data and writes them to the results file.
 
     browser : webdriver
         The browser that is used to extract the works.
 
-    start_in_work : int
-        When batch processing is used, this parameter indicates in which work start to parse.
+    candidates : list
+        The Crossref records of the user, when they have been harvested in bulk.
+
+    registry : WorkRegistry
+        The works already processed in the batch. A work processed for another user isn't requested again: a copy of
+        it is written for this user.
+
+    journal : ProgressJournal
+        The progress of the batch. The works already saved for this user, before the batch was stopped, are skipped.
 
     Returns
     -------
@@ -229,34 +266,106 @@ def gsc_user_works(soup: BeautifulSoup, user: User, file: BinaryIO, browser: web
 
     """
 
+    counter = 1
+    record = 1
+    listed = {}  # times each key has been listed by the user
+    for w in works:
+
+        key = work_key(w)
+
+        # The works of a user with the same title and without cluster id are different works, only the works of other
+        # users are shared by title
+        listed[key] = listed.get(key, 0) + 1
+        if listed[key] > 1 and not w['id']:
+            key = f"{key}#{listed[key]}"
+
+        w.key = key
+
+        # Batch processing: the works saved before the batch was stopped aren't requested again
+        if journal is not None and journal.done(user['id'], key):
+            record += 1
+            continue
+
+        source = registry.claim(key) if registry is not None else None
+
+        if source is not None:
+            # A co-author already listed this work: only the relation with this user is new
+            print(f"In work: {record} >>> {w['gsc_title']} (shared)\n")
+            pipeline.put_copy(source, w)
+            counter += 1
+            record += 1
+            continue
+
+        try:
+            if config.scholar['details'] == 'http':
+                gsc_work_details(work_details_http_request(w), w)
+            else:
+                gsc_work_details(work_details_request(browser, w['gsc_title']), w)
+
+            gsc_work_wos_citations(browser, w)
+
+            # The Crossref data is completed concurrently, the pipeline saves the work when it's ready
+            print(f"In work: {record} >>> {w['gsc_title']}\n")
+            future = pipeline.put(w, user, candidates)
+        except BaseException as err:
+            if registry is not None:
+                registry.fail(key, err)
+            raise
+
+        if registry is not None:
+            registry.resolve(key, future)
+
+        counter += 1
+        record += 1
+
+    return counter
+
+
+def gsc_works(soup: BeautifulSoup, user: User) -> Iterator[Work]:
+    """Parses the works listed in a Google Scholar citations per user page.
+
+    Only the data shown in the list is parsed, the works are completed by `gsc_user_works`.
+
+    Parameters
+    ----------
+    soup : BeautifulSoup
+        The HTML soup for the citations/user page (documents) for a particular user (author).
+
+    user : User
+        The user related to these documents.
+
+    Yields
+    ------
+    Work
+        Each work in the list, in the same order.
+
+    """
+
     if soup.find('tbody', id='gsc_a_b'):
         works_soup = soup.find_all('tr', class_='gsc_a_tr')
-        counter = 1
-        record = 1
         for work in works_soup:
-
-            # Batch processing: Start to parse in the work (position) specified
-            if start_in_work is not None and record < start_in_work:
-                record += 1
-                continue
+            # Looking up each cell once: the rows of a large profile are thousands of lookups
+            title_link = work.find(class_='gsc_a_t').a
+            citations_cell = work.find(class_='gsc_a_c')
 
             w = Work()
             w['user_id'] = user['id']
-            w['gsc_title'] = sub(r"\s", ' ', sub(r"\s+", ' ', work.find(class_='gsc_a_t').a.text)).strip()
+            w['gsc_title'] = clean_whitespace(title_link.text)
 
-            href = quote_plus(work.find(class_='gsc_a_t').a['data-href'].replace("&pagesize=100", ""))
-            w['url'] = f"{user['page'].url}#d=gs_md_cita-d&p=&u={href}%26tzom%3D360"
+            href = title_link['data-href'].replace("&pagesize=100", "")
+            w['url'] = f"{user['page'].url}#d=gs_md_cita-d&p=&u={quote_plus(href)}%26tzom%3D360"
+            w.details_url = ScholarURLType.BASE.value + href
 
             extra_data = work.find_all(class_="gs_gray")
             w['authors'] = extra_data[0].string
 
             try:
-                w['citations_count'] = int(work.find(class_='gsc_a_c').a.string)
+                w['citations_count'] = int(citations_cell.a.string)
             except Exception:
                 w['citations_count'] = 0
 
             try:
-                citations_url = (work.find(class_='gsc_a_c').a['href']).strip()
+                citations_url = (citations_cell.a['href']).strip()
                 w['citations_url'] = citations_url if citations_url else None
             except Exception:
                 w['citations_url'] = None
@@ -276,24 +385,71 @@ def gsc_user_works(soup: BeautifulSoup, user: User, file: BinaryIO, browser: web
                 w['year'] = work.find(class_='gsc_a_y').span.string
             except Exception:
                 w['year'] = None
-            gsc_work_details(work_details_request(browser, w['gsc_title']), w)
 
-            if config.crossref:
-                crf_work_details(w, user)
+            yield w
 
-            gsc_work_wos_citations(browser, w)
 
-            # Printing and saving to file
-            print(f"In work: {record} >>> {w.as_csv()}\n")
-            file.write((w.as_csv() + "\n").encode())
-            counter += 1
-            record += 1
+def gsc_work_wos_citations(browser: webdriver, work: Work) -> None:
+    key = work_key(work)
 
-        return counter
+    # The search is by title: a work without id nor title can't be told apart from any other one
+    cache = wos_cache if key != 'title:' else None
+    cached = cache.get(key) if cache is not None else None
 
+    if cached is not None:
+        work['wos_citations_count'] = cached['count']
+        work['wos_citations_url'] = cached['url']
+        print("WOS (cached): ", work['wos_citations_count'], sep=" ")
+        return
+
+    searched = False
+    if config.scholar['wos'] == 'http':
+        try:
+            gsc_search_wos_citations(work_wos_citations_http_request(work['gsc_title']), work)
+            searched = True
+        except BlockedError as err:
+            # The browser may still pass where the plain requests are blocked
+            print("!!!>>>", err)
+            logging_collector("WARNING", "BLOCKED", [err.url])
+
+    if not searched:
+        soup = work_wos_citations_request(browser, work['gsc_title'])  # send request and get the page source
+        gsc_search_wos_citations(soup, work)
+
+        browser.close()  # close the tab
+        waits.until(browser, 'wos_tab_closed', window_closed(1))
+        browser.switch_to.window(browser.window_handles[0])  # return to the main tab
+
+    if cache is not None:
+        cache.set(key, {'count': work['wos_citations_count'], 'url': work['wos_citations_url'],
+                        'fetched': datetime.datetime.now().isoformat()})
+
+
+def shared_work(work: Work, listed: Work) -> Work:
+    """Copies a work already processed for another user, related to the user that lists it again."""
+
+    copy = deepcopy(work)
+    copy['user_id'] = listed['user_id']
+    copy['url'] = listed['url']
+    copy.key = listed.key
+
+    return copy
 
-def gsc_work_wos_citations(browser: webdriver, work: Work) -> None:
-    soup = work_wos_citations_request(browser, work['gsc_title'])  # send request and get the page source
+
+def gsc_search_wos_citations(soup: BeautifulSoup, work: Work) -> None:
+    """Parses the Web of Science citations of a work from the Google Scholar search results for its title.
+
+    The first result whose title matches the work title is taken.
+
+    Parameters
+    ----------
+    soup : BeautifulSoup
+        The HTML soup for the search results page.
+
+    work : Work
+        The work searched, where the WOS citations count and URL are set.
+
+    """
 
     if soup.find('div', id='gs_res_ccl_mid') and soup.find('div', class_='gs_r gs_or gs_scl'):
         results = soup.find_all('div', class_='gs_r gs_or gs_scl')
@@ -304,11 +460,12 @@ def gsc_work_wos_citations(browser: webdriver, work: Work) -> None:
             if h3.find("a"):
                 h3 = h3.a
 
-            search_title = sub(r"\s", ' ', sub(r"\s+", ' ', h3.text))
-            search_title = sub(r"\[.*\]", '', search_title).strip().lower()
+            search_title = normalize_result_title(h3.text)
             profile_title = work['gsc_title'].lower()
 
-            if search_title is not None and SequenceMatcher(None, profile_title, search_title).ratio() >= 0.9:
+            ratio = similarity.ratio(profile_title, search_title)
+
+            if search_title is not None and ratio >= SEARCH_TITLE_THRESHOLD:
                 wos = result.find('a', class_='gs_nta gs_nph')
                 work['wos_citations_count'] = wos.string.replace('Web of Science:', '').strip() if wos is not None else wos
                 work['wos_citations_url'] = wos['href'] if wos is not None else wos
@@ -318,89 +475,207 @@ def gsc_work_wos_citations(browser: webdriver, work: Work) -> None:
                 logging_collector("INFO", "TITLE MISMATCH",
                                   [profile_title,  # Title in profile
                                    search_title,  # Title in search
-                                   SequenceMatcher(None, profile_title, search_title).ratio()])  # Coincidence
+                                   ratio])  # Coincidence
 
-    sleep(0.5)
-    browser.close()  # close the tab
-    sleep(0.5)
-    browser.switch_to.window(browser.window_handles[0])  # return to the main tab
 
+def crf_author_candidates(user: User) -> List[Tuple[str, dict]]:
+    """Downloads the Crossref records of an author in a few bulk queries.
 
-def crf_work_details(work: Work, user: User) -> None:
-    """Completes the data of a document using crossref API.
+    The records are queried by the user's name, and only the fields read by `crf_work_details` are requested.
 
-    We do this to make less requests to Google Scholar and to get the DOI.
+    Parameters
+    ----------
+    user : User
+        The user (author) whose records will be downloaded.
+
+    Returns
+    -------
+    list
+        Pairs with the normalized title and the record of each candidate.
+
+    """
+
+    print(">>> Harvesting crf records for", user['name'])
+
+    candidates = []
+    for item in crossref.iter_works(limit=config.crossref_author_limit, select=CROSSREF_FIELDS,
+                                    query_author=user['name']):
+        if item.get('title') and normalize_title(item['title'][0]):
+            candidates.append((normalize_title(item['title'][0]), item))
+
+    print(f"<<< {len(candidates)} crf records harvested")
+
+    return candidates
+
+
+def crf_local_items(gsc_title: str, candidates: List[Tuple[str, dict]]) -> List[dict]:
+    """Selects the candidates that may match a title, from the best to the worst match.
 
     Parameters
     ----------
-    work : Work
-        The work to get the data.
+    gsc_title : str
+        The normalized title of the work.
 
-    user : User
-        The user (author) of de document.
+    candidates : list
+        The candidates returned by `crf_author_candidates`.
+
+    Returns
+    -------
+    list
+        The records whose title could reach the approximation threshold, sorted by similarity.
 
     """
-    print(">>> Entering crf")
-    print("Title:", work['gsc_title'])
 
-    # Init habanero object
-    crossref = Crossref(mailto=config.crossref_to)
-    d = crossref.works(query_title=work['gsc_title'])
+    scored = []
+    for crf_title, item in candidates:
+        if crf_title == gsc_title:
+            return [item]
 
-    try:
-        items = d['message']['items']
+        ratio = similarity.ratio(crf_title, gsc_title, CRF_TITLE_THRESHOLD)
+        if ratio:
+            scored.append((ratio, item))
 
-        # Removing all unnecessary characters to make a title comparision
-        regex = r"[^0-9a-zA-ZáàâäéèêëíìîïóòôöúùûüñçÿæœßÁÀÂÄÉÈËÊÍÎÌÏÓÒÔÖÚÙÛÜÑÇŸÆŒẞ]"
-        gsc_title = sub(regex, '', unescape(work['gsc_title'].lower()))
+    return [item for ratio, item in sorted(scored, key=lambda pair: pair[0], reverse=True)]
 
-        match_ratio = 1
 
+def crf_title_items(title: str) -> List[dict]:
+    """Queries Crossref by a title, or reads the records of the query from the cache.
+
+    Parameters
+    ----------
+    title : str
+        The title of the work, as listed in Google Scholar.
+
+    Returns
+    -------
+    list
+        The records returned by Crossref, with only the fields in CROSSREF_FIELDS.
+
+    """
+
+    items = crossref_cache.get(title_key(title)) if crossref_cache is not None else None
+
+    if items is None:
+        d = crossref.works(query_title=title)
+        items = [{field: item[field] for field in CROSSREF_FIELDS if field in item} for item in d['message']['items']]
+
+        if crossref_cache is not None:
+            crossref_cache.set(title_key(title), items)
+
+    return items
+
+
+def crf_match(items: List[dict], gsc_title: str, user: User) -> Tuple[dict, float]:
+    """Finds the record of a work among Crossref records.
+
+    A record with the same title is a perfect match. Otherwise, the first record with a similar enough title matches
+    only if one of its authors is similar enough to the user.
+
+    Parameters
+    ----------
+    items : list
+        The Crossref records.
+
+    gsc_title : str
+        The normalized title of the work.
+
+    user : User
+        The user (author) of the work.
+
+    Returns
+    -------
+    dict, float
+        The record and the similarity of its title, or None and 0 if no record matches.
+
+    """
+
+    try:
         # Search first for a perfect match: this is a loop
         details = next((item for item in items if
-                        sub(regex, '', unescape(item['title'][0].lower())) ==
-                        gsc_title), None)
+                        normalize_title(item['title'][0]) == gsc_title), None)
+
+        if details is not None:
+            return details, 1
 
         # If there isn't a perfect match, search for an approximation
-        if details is None:
-            found = [False, False]
+        for item in items:
 
-            for item in items:
+            crf_title = normalize_title(item['title'][0])
+            match_ratio = similarity.ratio(crf_title, gsc_title, CRF_TITLE_THRESHOLD)
 
-                crf_title = sub(regex, '', unescape(item['title'][0].lower()))
-                crf_title = sub(r"\s", ' ', sub(r"\s+", ' ', crf_title)).strip()
-                match_ratio = SequenceMatcher(None, crf_title, gsc_title).ratio()
+            if match_ratio >= CRF_TITLE_THRESHOLD:
+                authors = item['author'] if 'author' in item else []
+                gsc_name = normalize_person_name(user['name'])
 
-                if match_ratio >= 0.75:
-                    details = item
-                    found[0] = True
+                for author in authors:
 
-                    authors = details['author'] if 'author' in details else []
-                    gsc_name = user['name'].lower()
+                    if {'given', 'family'} <= set(author):
+                        crf_name = normalize_person_name(f"{author['given']} {author['family']}")
+                    elif 'given' in author:
+                        crf_name = normalize_person_name(author['given'])
+                    elif 'family' in author:
+                        crf_name = normalize_person_name(author['family'])
+                    else:
+                        continue
 
-                    for author in authors:
+                    name_ratio = similarity.ratio(crf_name, gsc_name, CRF_NAME_THRESHOLD)
 
-                        if {'given', 'family'} <= set(author):
-                            crf_name = f"{author['given']} {author['family']}".lower()
-                        elif 'given' in author:
-                            crf_name = f"{author['given']}".lower()
-                        elif 'family' in author:
-                            crf_name = f"{author['family']}".lower()
-                        else:
-                            continue
+                    if name_ratio >= CRF_NAME_THRESHOLD:
+                        return item, match_ratio
+                break
 
-                        name_ratio = SequenceMatcher(None, crf_name, gsc_name).ratio()
+    except IndexError:
+        pass
 
-                        if name_ratio >= 0.69:
-                            found[1] = True
-                            break
-                    break
+    return None, 0
 
-            if not (found[0] and found[1]):
-                print("<<< Leaving crf")
-                return
 
-    except IndexError:
+def crf_work_details(work: Work, user: User, candidates: List[Tuple[str, dict]] = None) -> None:
+    """Completes the data of a document using crossref API.
+
+    We do this to make less requests to Google Scholar and to get the DOI.
+
+    Parameters
+    ----------
+    work : Work
+        The work to get the data.
+
+    user : User
+        The user (author) of de document.
+
+    candidates : list
+        The Crossref records of the user harvested by `crf_author_candidates`. When given, the work is matched against
+        them first, and Crossref is queried by title only if none of them matches.
+
+    Notes
+    -----
+    In snapshot mode the candidates are searched in the local Crossref index, and no request is sent to Crossref.
+
+    """
+    print(">>> Entering crf")
+    print("Title:", work['gsc_title'])
+
+    gsc_title = normalize_title(work['gsc_title'])
+
+    # Without any comparable character, every title would be a perfect match
+    if not gsc_title:
+        print("<<< Leaving crf")
+        return
+
+    if candidates is not None:
+        details, match_ratio = crf_match(crf_local_items(gsc_title, candidates), gsc_title, user)
+
+        # The records of an author are capped at author_limit, and the name queries are sorted by relevance, so the
+        # work may still be found by its title
+        if details is None:
+            details, match_ratio = crf_match(crf_title_items(work['gsc_title']), gsc_title, user)
+    elif crossref_snapshot is not None:
+        details, match_ratio = crf_match(crossref_snapshot.search(work['gsc_title'], config.crossref_snapshot_k),
+                                         gsc_title, user)
+    else:
+        details, match_ratio = crf_match(crf_title_items(work['gsc_title']), gsc_title, user)
+
+    if details is None:
         print("<<< Leaving crf")
         return
 
@@ -408,7 +683,7 @@ def crf_work_details(work: Work, user: User) -> None:
 
     if work['match_ratio'] < 1:
         # Removing any extra unnecessary blanks and replacing any blank for a single space
-        work['crf_title'] = sub(r"\s", ' ', sub(r"\s+", ' ', details['title'][0]))
+        work['crf_title'] = clean_whitespace(details['title'][0])
 
     if work['volume'] is None:
         if 'volume' in details:
@@ -427,7 +702,7 @@ def crf_work_details(work: Work, user: User) -> None:
 
     if 'container-title' in details:
         # Removing any extra unnecessary blanks and replacing any blank for a single space
-        work['crf_publication'] = sub(r"\s", ' ', sub(r"\s+", ' ', details['container-title'][0]))
+        work['crf_publication'] = clean_whitespace(details['container-title'][0])
 
     if 'type' in details:
         work['crf_type'] = details['type']
@@ -507,16 +782,129 @@ def gsc_work_details(soup: BeautifulSoup, work: Work) -> None:
 
 # region Request functions
 def wait():
-    while pause:
-        continue
+    # Blocks (without spinning) until the speed limits of Google Scholar permit a new request from the browser
+    limiters.acquire(ScholarURLType.BASE.value, proxied=False)
 
 
-def beautifulsoup_request(target: str) -> BeautifulSoup:
-    wait()  # Waiting for the adaptive request rate
-    r = requests.get(target)  # requests.get(url)
+def browser_blocked(browser: webdriver) -> bool:
+    """Tells if Google Scholar is showing a captcha instead of the page, and slows the browser requests down if so."""
+
+    try:
+        is_blocked = browser.execute_script(BLOCK_SCRIPT)
+    except WebDriverException:
+        return False
+
+    if is_blocked:
+        limiters.blocked(ScholarURLType.BASE.value, proxied=False)
+        logging_collector("WARNING", "BLOCKED", [browser.current_url, "", ""])
+
+    return bool(is_blocked)
+
+
+def beautifulsoup_request(target: str, only: str = None) -> BeautifulSoup:
+    r = http.get(target)  # the session waits for the speed limits of the host
     requestmeter.count()
     html_ = r.content
-    return BeautifulSoup(html_, 'html.parser')
+
+    # A captcha or an error page doesn't have any of the data, so it mustn't be parsed as an empty page
+    if blocked(html_, r.url, r.status_code):
+        limiters.blocked(target)
+        raise BlockedError(target)
+
+    limiters.succeeded(target)
+
+    return make_soup(html_, only)
+
+
+def user_works(user: User, browser: webdriver = None) -> Iterator[Work]:
+    """Lists the works of a user, in the browser or over HTTP according to the configuration.
+
+    Parameters
+    ----------
+    user : User
+        The user whose works will be listed.
+
+    browser : webdriver
+        The browser, only used when the profile mode is 'browser'. The configuration doesn't allow listing the works
+        over HTTP when the details mode is 'browser', since the details are got by clicking the titles in the browser.
+
+    Returns
+    -------
+    iterator
+        The works of the user, in the same order as in the profile.
+
+    """
+
+    if config.scholar['profile'] == 'http':
+        return chain.from_iterable(user_works_pages(user, config.scholar['prefetch']))
+
+    # get user main page
+    display_user_page_request(browser, user['page'].first_url())
+
+    # list all works in the user main page
+    display_all_user_works_requests(browser)
+
+    return gsc_works(make_soup(browser.page_source, 'works'), user)
+
+
+def user_works_pages(user: User, prefetch: bool = False) -> Iterator[List[Work]]:
+    """Fetches the pages of a user profile over HTTP, parsing each page only when it's requested.
+
+    Parameters
+    ----------
+    user : User
+        The user whose works will be listed.
+
+    prefetch : bool
+        If True, the next page is fetched in background while the current one is processed.
+
+    Yields
+    ------
+    list
+        The works listed in each page of the profile.
+
+    """
+
+    page = URLFactory(type_=ScholarURLType.CITATIONS_USER, url=user['page'].url)
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def fetch(target: str) -> BeautifulSoup:
+        return beautifulsoup_request(target, 'works')
+
+    try:
+        url = page.first_url()
+        pending = executor.submit(fetch, url) if prefetch else None
+
+        while True:
+            works = list(gsc_works(pending.result() if prefetch else fetch(url), user))
+
+            # A page with less works than the page size is the last one
+            last = len(works) < page.page_size
+
+            if not last:
+                url = page.next_url()
+                if prefetch:
+                    pending = executor.submit(fetch, url)
+
+            yield works
+
+            if last:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def new_browser() -> webdriver:
+    """Starts a new Selenium browser."""
+
+    browser = firefox(config.driver, config.browser['headless'], config.browser['block'],
+                      config.browser['page_load_strategy'], config.browser['cache_dir'])
+
+    if not config.browser['headless']:
+        browser.maximize_window()
+
+    return browser
 
 
 def display_user_page_request(browser: webdriver, target: str) -> None:
@@ -524,14 +912,40 @@ def display_user_page_request(browser: webdriver, target: str) -> None:
     browser.get(target)
     requestmeter.count()
 
+    # With the 'eager' and 'none' page load strategies, get() may return before the works list is displayed
+    try:
+        waits.until(browser, 'profile_works', EC.presence_of_element_located((By.ID, 'gsc_bpf_more')))
+    except TimeoutException:
+        if browser_blocked(browser):
+            raise BlockedError(target)
+        raise
+
+    limiters.succeeded(ScholarURLType.BASE.value, proxied=False)
+
 
 def display_all_user_works_requests(browser: webdriver) -> None:
+    rows = (By.CSS_SELECTOR, '#gsc_a_b .gsc_a_tr')
+
     is_enable = browser.find_element_by_id('gsc_bpf_more').is_enabled()
     while is_enable:
+        displayed = len(browser.find_elements(*rows))
+
         wait()  # Waiting for the adaptive request rate
-        browser.find_element_by_id('gsc_bpf_more').click()
+        waits.click(browser.find_element_by_id('gsc_bpf_more'), 'more_works_click')
         requestmeter.count()
-        sleep(0.5)
+
+        try:
+            # Each click appends the next page of works to the list
+            waits.until(browser, 'more_works_rows', rows_more_than(rows, displayed))
+        except TimeoutException:
+            if browser_blocked(browser):
+                raise BlockedError(browser.current_url)
+
+            print("!!!>>> The works list stopped growing after", displayed, "works")
+            break
+
+        limiters.succeeded(ScholarURLType.BASE.value, proxied=False)
+
         is_enable = browser.find_element_by_id('gsc_bpf_more').is_enabled()
 
 
@@ -540,16 +954,21 @@ def work_details_request(browser: webdriver, title: str) -> BeautifulSoup:
     try:
         work = browser.find_element_by_link_text(title)
 
-        # Waiting 'till link is clickable
-        while True:
-            try:
-                work.click()
-                break
-            except ElementClickInterceptedException:
-                continue
+        # The details of the previous work may still be in the modal window
+        shown = browser.find_elements_by_id('gsc_vcd_table')
 
+        # Waiting 'till link is clickable (the modal window of the previous work may be closing)
+        waits.click(work, 'details_click')
         requestmeter.count()
-        sleep(0.5)  # This delay permits the html display entirely
+
+        try:
+            waits.until(browser, 'details_modal',
+                        element_replaced((By.ID, 'gsc_vcd_table'), shown[0] if shown else None))
+        except TimeoutException:
+            browser_blocked(browser)  # slows the next requests down, the work is logged below anyway
+            raise
+
+        limiters.succeeded(ScholarURLType.BASE.value, proxied=False)
         html_ = browser.page_source
         close_button = browser.find_element_by_id('gs_md_cita-d-x')
         close_button.click()
@@ -563,7 +982,38 @@ def work_details_request(browser: webdriver, title: str) -> BeautifulSoup:
                            err])  # Error
         return None
 
-    return BeautifulSoup(html_, 'html.parser')
+    return make_soup(html_, 'details')
+
+
+def work_details_http_request(work: Work) -> BeautifulSoup:
+    """Gets the citation view of a work, with its details, without the browser.
+
+    Like `work_details_request`, a work whose details can't be downloaded (the request was blocked or failed) is
+    logged and returns None, so the work is saved without its details instead of stopping the user.
+
+    """
+
+    if work.details_url is None:
+        return None
+
+    try:
+        return beautifulsoup_request(work.details_url, 'details')
+    except (BlockedError, RequestException) as err:
+        print("!!!>>>", work['gsc_title'])
+        print(err)
+
+        logging_collector("ERROR", "DETAILS NOT DOWNLOADED",
+                          [work['user_id'],  # Author
+                           work['gsc_title'],  # Title
+                           err])  # Error
+        return None
+
+
+def work_wos_citations_http_request(title: str) -> BeautifulSoup:
+    """Searches a title in Google Scholar without the browser, raising BlockedError if the request is blocked."""
+
+    url = ScholarURLType.BASE.value + ScholarURLType.SEARCH.value.replace('<title>', quote_plus(title))
+    return beautifulsoup_request(url, 'results')
 
 
 def work_wos_citations_request(browser: webdriver, title: str):
@@ -571,18 +1021,27 @@ def work_wos_citations_request(browser: webdriver, title: str):
 
     wait()
     browser.execute_script(f"""window.open("{url}","_blank");""")  # request
-    WebDriverWait(browser, 10).until(EC.number_of_windows_to_be(2))
+    waits.until(browser, 'wos_tab_opened', EC.number_of_windows_to_be(2))
     requestmeter.count()
 
     browser.switch_to.window(browser.window_handles[1])  # changes to the new tab
-    WebDriverWait(browser, 10).until(EC.presence_of_element_located((By.NAME, 'q')))
+    waits.until(browser, 'wos_search_box', EC.presence_of_element_located((By.NAME, 'q')))
     search_box = browser.find_element_by_name('q')  # gets the search box
+    shown = browser.find_elements_by_id('gs_res_ccl_mid')  # the results of the url
     search_box.send_keys(title)  # puts the query
     search_box.submit()  # send the request
 
-    WebDriverWait(browser, 10).until(EC.presence_of_element_located((By.NAME, 'q')))
+    # Waiting for the results of the query, not the ones already displayed
+    try:
+        waits.until(browser, 'wos_results', element_replaced((By.ID, 'gs_res_ccl_mid'), shown[0] if shown else None))
+    except TimeoutException:
+        if browser_blocked(browser):
+            raise BlockedError(url)
+        raise
+
+    limiters.succeeded(ScholarURLType.BASE.value, proxied=False)
 
-    return BeautifulSoup(browser.page_source, 'html.parser')
+    return make_soup(browser.page_source, 'results')
 
 
 # endregion Request functions
@@ -613,7 +1072,7 @@ def download_users(keywords: str) -> Tuple[str, int]:
     print(citations_page.generate())
 
     # HTML of the list of authors
-    users_soup = beautifulsoup_request(citations_page.generate())  # request(citations_page.generate())
+    users_soup = beautifulsoup_request(citations_page.generate(), 'users')
 
     # All the authors
     users_list = []
@@ -630,7 +1089,7 @@ def download_users(keywords: str) -> Tuple[str, int]:
                 users_soup.find('button', attrs={'aria-label': 'Next'}).has_attr('onclick') is not True:
             break
 
-        users_soup = beautifulsoup_request(citations_page.next_url(users_soup))  # request(citations_page.next_url(users_soup))
+        users_soup = beautifulsoup_request(citations_page.next_url(users_soup), 'users')
         page += 1
 
     batch_name = config.download_dir + f"users_batch_{strftime('%y%m%d')}_{strftime('%I%M%S')}.csv"
@@ -642,7 +1101,7 @@ def download_users(keywords: str) -> Tuple[str, int]:
             print("*****************")
 
             citations_user_page = user['page']
-            works_soup = beautifulsoup_request(citations_user_page.url)  # request(citations_user_page.url)
+            works_soup = beautifulsoup_request(citations_user_page.url, 'graph')
 
             gsc_user_citations_graph(works_soup, user)
             print(user.as_csv())
@@ -653,22 +1112,24 @@ def download_users(keywords: str) -> Tuple[str, int]:
     return batch_name, len(users_list)
 
 
-def download_works(users_batch_path: str, *slices, start_in_user: int = None, start_in_work: int = None) -> None:
+def download_works(users_batch_path: str, *slices, workers: int = 1) -> None:
     """Downloads works from Google Scholar for specific users.
 
     Downloads the works of the users indicated from the `start` to the `stop` positions in the `user_batch_file.
 
+    The progress is journaled next to the works batch file, so running the same batch again resumes it where it
+    stopped: the users and works already saved are skipped, and a row written partially is removed.
+
     Parameters
     ----------
     slices : object
     users_batch_path : str
         The URI to the `user_batch_file` generated by the `download_users` function.
 
-    start_in_work : int
-        Start processing in this specified line (user).
-
-    start_in_user : int
-        Propagate this value to start processing in this specified work.
+    workers : int
+        Number of users processed at the same time, each one with its own browser. The requests of every worker are
+        taken from the same speed limits. Each worker writes its works to a shard of the batch file, and the shards are
+        appended to the batch file at the end, with the shards left by a stopped run, whatever its number of workers.
 
     See Also
     --------
@@ -676,7 +1137,7 @@ def download_works(users_batch_path: str, *slices, start_in_user: int = None, st
 
     """
     # Configuring batch processing
-    users = slice_users(users_batch_path, slices, start_in_user)
+    users = slice_users(users_batch_path, slices)
 
     # region Configuring batch file name
     # Converting tuple to suffix for name the file
@@ -689,41 +1150,189 @@ def download_works(users_batch_path: str, *slices, start_in_user: int = None, st
 
     parts = basename(users_batch_path).replace('.csv', '').split('_')
     batch_name = config.download_dir + f"works_batch_{parts[2]}_{parts[3]}_{suffix}.csv"
-    append = True if exists(batch_name) else False
     # endregion
 
-    with open(batch_name, 'ab') as works_batch_file:
+    journal = ProgressJournal(batch_name.replace('.csv', '.journal'))
+    requestmeter.attach("Journal", journal)
+
+    # Removing anything written after the last work journaled (e.g., a row cut by a crash)
+    journal.rollback(config.download_dir)
+
+    # With several workers, each one writes to its own shard of the batch file
+    shards = [batch_name] if workers == 1 else [batch_name.replace('.csv', f"_w{index}.csv")
+                                                for index in range(1, workers + 1)]
+
+    pending = Queue()
+    for user in users:
+        if journal.completed(user['id']):
+            print(f"********** {user['name']} (done) **********")
+        else:
+            pending.put(user)
+
+    # The works shared by several users of the batch are processed once
+    registry = WorkRegistry()
+    requestmeter.attach("Shared works", registry)
+
+    browsers = BrowserPool(new_browser, max(config.browser['pool_size'], workers), config.browser['max_uses'])
+    requestmeter.attach("Browser pool", browsers)
+
+    stop = Event()  # set when a worker fails, so the others don't take more users
+    results = [None] * workers  # works downloaded or error, by worker
+
+    def run(index: int) -> None:
+        try:
+            results[index] = download_works_shard(shards[index], pending, journal, registry, browsers, stop,
+                                                  "Enrichment" if workers == 1 else f"Enrichment {index + 1}")
+        except BaseException as err:
+            stop.set()
+            results[index] = err
+
+    try:
+        if workers == 1:
+            run(0)
+        else:
+            threads = [Thread(target=run, args=(index,), name=f"worker-{index + 1}") for index in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        browsers.close()
+
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        # Every shard journaled and not merged yet, including the ones of a run with another number of workers
+        shards = [config.download_dir + name for name in sorted(journal.offsets) if name != basename(batch_name)]
+        if shards:
+            merge_shards(batch_name, shards, journal)
+    finally:
+        journal.close()
+
+    total_works = sum(results)
+
+    print("Total works: ", total_works)
+
+
+def download_works_shard(shard: str, pending: Queue, journal: ProgressJournal, registry: WorkRegistry,
+                         browsers: BrowserPool, stop: Event, name: str = "Enrichment") -> int:
+    """Downloads the works of the users taken from a queue, until it's empty, writing them to a file of the batch.
+
+    Parameters
+    ----------
+    shard : str
+        The file where the works are written: the batch file, or a shard of it when there are several workers.
+
+    pending : Queue
+        The users not processed yet, shared by the workers.
+
+    journal : ProgressJournal
+        The progress of the batch, shared by the workers.
+
+    registry : WorkRegistry
+        The works processed in the batch, shared by the workers.
+
+    browsers : BrowserPool
+        The browsers, shared by the workers.
+
+    stop : Event
+        When it's set, no more users are taken from the queue.
+
+    name : str
+        The name of the enrichment stage in the summary.
+
+    Returns
+    -------
+    int
+        Total works downloaded.
+
+    """
+
+    file_name = basename(shard)
+
+    # A file unknown to a journal already started only has works not journaled (e.g., a shard already merged)
+    append = exists(shard) and (file_name in journal.offsets or not journal.offsets)
+
+    with open(shard, 'ab' if append else 'wb') as works_batch_file:
         # If the file doesn't exist before or is empty, write the header
-        if not append or not (getsize(batch_name) > 0):
+        if not append or not (getsize(shard) > 0):
             works_batch_file.write((Work().keys() + "\n").encode())
+            works_batch_file.flush()
+
+        journal.start(file_name, works_batch_file.tell())
+
+        def save(work: Work) -> None:
+            print(f"Saved >>> {work.as_csv()}\n")
+            works_batch_file.write((work.as_csv() + "\n").encode())
+
+            # The row must be on disk before it's journaled
+            works_batch_file.flush()
+            fsync(works_batch_file.fileno())
+            journal.record(work['user_id'], work.key, file_name, works_batch_file.tell())
+
+        def complete(user_id: str) -> None:
+            journal.complete(user_id, file_name, works_batch_file.tell())
+
+        pipeline = EnrichmentPipeline(crf_work_details if config.crossref else None, save,
+                                      config.crossref_workers if config.crossref else 1, copy=shared_work)
+        requestmeter.attach(name, pipeline)
 
         total_works = 0
-        for user in users:
-            print(f"********** {user['name']} **********")
-            # region Open Selenium browser
-            browser = webdriver.Firefox(executable_path=config.driver)
-            browser.maximize_window()
+        try:
+            while not stop.is_set():
+                try:
+                    user = pending.get_nowait()
+                except Empty:
+                    break
 
-            # get user main page
-            display_user_page_request(browser, user['page'].first_url())
+                print(f"********** {user['name']} **********")
 
-            # list all works in the user main page
-            display_all_user_works_requests(browser)
-            # endregion
+                # In author mode, all the works of the user are matched against the same Crossref records
+                candidates = crf_author_candidates(user) if config.crossref and config.crossref_mode == 'author' \
+                    else None
 
-            works_soup = BeautifulSoup(browser.page_source, 'html.parser')
-            total_works += gsc_user_works(works_soup, user, works_batch_file, browser, start_in_work)
+                # The browser is only started if a stage needs it, e.g., not when every page is requested over http
+                with browsers.lazy_browser() as browser:
+                    works = user_works(user, browser)
+                    total_works += gsc_user_works(works, user, pipeline, browser, candidates, registry, journal)
 
-            # The start_in_work applies just for the first user
-            if start_in_work is not None:
-                start_in_work = None
+                # The user is journaled as completed once all its works are saved
+                pipeline.put_callback(lambda user_id=user['id']: complete(user_id))
+        finally:
+            # Waiting for the works still in the enrichment stage
+            pipeline.close()
 
-            browser.close()
+    return total_works
 
-    print("Total works: ", total_works)
 
+def merge_shards(batch_name: str, shards: List[str], journal: ProgressJournal) -> None:
+    """Appends the works of the shards written by the workers to the batch file, and removes the shards."""
+
+    append = exists(batch_name) and getsize(batch_name) > 0
 
-def slice_users(users_batch_path: str, slices: Tuple, start_in_user: int) -> Tuple:
+    with open(batch_name, 'ab') as works_batch_file:
+        if not append:
+            works_batch_file.write((Work().keys() + "\n").encode())
+
+        for shard in shards:
+            if not exists(shard):
+                continue
+
+            with open(shard, 'rb') as shard_file:
+                shard_file.readline()  # header
+                copyfileobj(shard_file, works_batch_file)
+
+            works_batch_file.flush()
+            fsync(works_batch_file.fileno())
+
+            # Once journaled, the shard is never merged again, even if it can't be removed now
+            journal.merged(basename(shard), basename(batch_name), works_batch_file.tell())
+            remove(shard)
+
+
+def slice_users(users_batch_path: str, slices: Tuple) -> Tuple:
     users = []
     with open(users_batch_path, 'r', encoding='utf8') as file:
         records = len(file.readlines())
@@ -731,9 +1340,6 @@ def slice_users(users_batch_path: str, slices: Tuple, start_in_user: int) -> Tup
 
         indexes = sliced_indexes(slices, records)
 
-        if start_in_user is not None and start_in_user in indexes:
-            indexes = indexes[indexes.index(start_in_user):]
-
         r = reader(file, delimiter='|')
         for index, row in enumerate(r):
             if index in indexes:
@@ -808,13 +1414,18 @@ def logging_collector(type_: str, title: str, messages: List) -> None:
 
 
 if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description="Scraps Google Scholar data")
+    arguments.add_argument('--workers', type=int, default=1,
+                           help="users processed at the same time, each one in its own browser, default: 1")
+    options = arguments.parse_args()
+
     # Start request ratio counting
     requestmeter.start()
     try:
         # Search keywords
         # kw = '''universidad nacional autonoma de mexico "instituto de ingenieria"'''
         # download_users(kw)
-        download_works(config.download_dir + "users_batch_181009_021134.csv", (21,40))
+        download_works(config.download_dir + "users_batch_181009_021134.csv", (21,40), workers=options.workers)
         notify("Batch finished", "The batch finished successfully!")
     except Exception as e:
         trace = traceback.format_exc()
@@ -0,0 +1,288 @@
+# Python imports
+from contextlib import contextmanager
+from queue import Empty, Queue
+from threading import Lock
+from time import monotonic
+from typing import Callable, Iterable
+
+# Vendor imports
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+
+# Firefox preferences that stop downloading the assets that the scrapper never reads
+BLOCK_PREFERENCES = {
+    'images': {'permissions.default.image': 2},
+    'styles': {'permissions.default.stylesheet': 2},
+    'fonts': {'browser.display.use_document_fonts': 0, 'gfx.downloadable_fonts.enabled': False},
+}
+
+CACHE_CAPACITY = 262144  # KiB of the disk cache shared by the browsers
+
+
+class BrowserPool:
+    """
+    A pool of long-lived browsers, checked out for each user instead of starting a new browser every time.
+
+    The browsers are created when they are needed, up to the pool size. Each browser is reset when it's returned (its
+    cookies removed and its extra tabs closed), and it's replaced by a new one when it has crashed or when it has been
+    used the maximum number of times.
+
+    Attributes
+    ----------
+    factory : callable
+        Function that starts a new browser.
+
+    size : int
+        Maximum number of browsers alive at the same time.
+
+    max_uses : int
+        Number of checkouts after which a browser is replaced. None means it's never replaced while it works.
+
+    created : int
+        Number of browsers started.
+
+    recycled : int
+        Number of browsers replaced, because they crashed or reached the maximum number of uses.
+
+    waited : float
+        Total seconds spent waiting for a browser to be available.
+
+    """
+
+    def __init__(self, factory: Callable, size: int = 1, max_uses: int = None):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.created = 0
+        self.recycled = 0
+        self.checkouts = 0
+        self.waited = 0.0
+
+        self.__idle = Queue()
+        self.__uses = {}  # checkouts by browser
+        self.__alive = 0
+        self.__closed = False
+        self.__lock = Lock()
+
+    @contextmanager
+    def browser(self):
+        """Checks out a browser for the duration of a `with` block, and returns it to the pool at the end."""
+
+        browser = self.checkout()
+        try:
+            yield browser
+        finally:
+            self.checkin(browser)
+
+    @contextmanager
+    def lazy_browser(self):
+        """Like `browser`, but the browser is only checked out (and started) if the `with` block uses it."""
+
+        browser = LazyBrowser(self)
+        try:
+            yield browser
+        finally:
+            browser.release()
+
+    def checkout(self):
+        start = monotonic()
+        browser = None
+
+        while browser is None:
+            try:
+                browser = self.__idle.get_nowait()
+            except Empty:
+                if self.__reserve():
+                    browser = self.__new()
+                else:
+                    # Waiting for a browser to be returned, or for a place left by a recycled one
+                    try:
+                        browser = self.__idle.get(timeout=1)
+                    except Empty:
+                        continue
+
+            # A browser that crashed while it was idle is replaced
+            if not self.healthy(browser):
+                self.__discard(browser)
+                browser = None
+
+        with self.__lock:
+            self.waited += monotonic() - start
+            self.checkouts += 1
+            self.__uses[browser] += 1
+
+        return browser
+
+    def checkin(self, browser) -> None:
+        if self.__closed:
+            self.__quit(browser)
+            return
+
+        if self.max_uses is not None and self.__uses[browser] >= self.max_uses or not self.reset(browser):
+            self.__discard(browser)
+            return
+
+        self.__idle.put(browser)
+
+    @staticmethod
+    def healthy(browser) -> bool:
+        try:
+            return len(browser.window_handles) > 0
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def reset(browser) -> bool:
+        """Leaves a browser as new: a single blank tab without cookies. Returns False if the browser doesn't respond."""
+
+        try:
+            handles = browser.window_handles
+            for handle in handles[1:]:
+                browser.switch_to.window(handle)
+                browser.close()
+
+            browser.switch_to.window(handles[0])
+            browser.delete_all_cookies()
+            browser.get('about:blank')
+        except WebDriverException:
+            return False
+
+        return True
+
+    def close(self) -> None:
+        """Quits the idle browsers. The browsers still checked out are quit when they are returned."""
+
+        self.__closed = True
+
+        while True:
+            try:
+                browser = self.__idle.get_nowait()
+            except Empty:
+                break
+
+            self.__quit(browser)
+
+    def stats(self) -> dict:
+        return {'size': self.size, 'created': self.created, 'recycled': self.recycled, 'checkouts': self.checkouts,
+                'waited': round(self.waited, 3)}
+
+    def __reserve(self) -> bool:
+        """Reserves a place for a new browser, if the pool isn't full."""
+
+        with self.__lock:
+            if not self.__closed and self.__alive < self.size:
+                self.__alive += 1
+                return True
+
+        return False
+
+    def __new(self):
+        try:
+            browser = self.factory()
+        except Exception:
+            with self.__lock:
+                self.__alive -= 1
+            raise
+
+        with self.__lock:
+            self.created += 1
+            self.__uses[browser] = 0
+
+        return browser
+
+    def __discard(self, browser) -> None:
+        self.__quit(browser)
+
+        with self.__lock:
+            self.recycled += 1
+
+    def __quit(self, browser) -> None:
+        try:
+            browser.quit()
+        except WebDriverException:
+            pass
+
+        with self.__lock:
+            self.__alive -= 1
+            self.__uses.pop(browser, None)
+
+
+class LazyBrowser:
+    """
+    Stands for a browser of a pool, checked out the first time any of its attributes is used.
+
+    It's given to the stages that may not need a browser at all (e.g., when every page is requested over http, and the
+    browser is only a fallback), so no browser is started for nothing.
+
+    """
+
+    def __init__(self, pool: BrowserPool):
+        self.__pool = pool
+        self.__browser = None
+
+    @property
+    def checked_out(self) -> bool:
+        return self.__browser is not None
+
+    def release(self) -> None:
+        """Returns the browser to the pool, if it was checked out."""
+
+        if self.__browser is not None:
+            self.__pool.checkin(self.__browser)
+            self.__browser = None
+
+    def __getattr__(self, name: str):
+        if self.__browser is None:
+            self.__browser = self.__pool.checkout()
+
+        return getattr(self.__browser, name)
+
+
+def firefox(driver: str, headless: bool = False, block: Iterable[str] = (), page_load_strategy: str = 'normal',
+            cache_dir: str = None) -> webdriver.Firefox:
+    """Starts a Firefox browser configured to load the Google Scholar pages as fast as possible.
+
+    Parameters
+    ----------
+    driver : str
+        The path of geckodriver.
+
+    headless : bool
+        If True, the browser runs without a window.
+
+    block : iterable
+        The assets not downloaded: any of 'images', 'styles' and 'fonts'.
+
+    page_load_strategy : str
+        When a navigation is considered finished: 'normal' waits for every asset, 'eager' only for the document to be
+        parsed (DOMContentLoaded) and 'none' returns at once, so the callers must wait for the elements they need.
+
+    cache_dir : str
+        Directory of a disk cache shared by every session, so the static assets are downloaded only once. None uses the
+        cache of the temporary profile of each session.
+
+    Returns
+    -------
+    webdriver.Firefox
+        The browser.
+
+    """
+
+    options = webdriver.FirefoxOptions()
+    options.headless = headless
+
+    for asset in block:
+        for preference, value in BLOCK_PREFERENCES[asset].items():
+            options.set_preference(preference, value)
+
+    if cache_dir is not None:
+        options.set_preference('browser.cache.disk.enable', True)
+        options.set_preference('browser.cache.disk.parent_directory', cache_dir)
+        options.set_preference('browser.cache.disk.capacity', CACHE_CAPACITY)
+        options.set_preference('browser.cache.disk.smart_size.enabled', False)
+
+    capabilities = DesiredCapabilities.FIREFOX.copy()
+    capabilities['pageLoadStrategy'] = page_load_strategy
+
+    return webdriver.Firefox(executable_path=driver, options=options, desired_capabilities=capabilities)
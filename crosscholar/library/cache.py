@@ -0,0 +1,102 @@
+# Python imports
+import json
+import sqlite3
+from threading import Lock
+from time import time
+
+
+class PersistentCache:
+    """
+    A key-value cache stored in a SQLite table, so its entries survive between runs.
+
+    The values are stored as JSON. An entry older than the time to live is treated as missing, and when the cache
+    holds more entries than allowed, the least recently used are evicted.
+
+    Attributes
+    ----------
+    table : str
+        Name of the SQLite table that holds the entries. Several caches can share the same database file.
+
+    ttl : float
+        Time to live of an entry, in seconds. None means the entries never expire.
+
+    max_entries : int
+        Maximum number of entries in the cache. None means there's no limit.
+
+    hits : int
+        Number of lookups that found a fresh entry.
+
+    misses : int
+        Number of lookups that didn't find an entry or found an expired one.
+
+    evictions : int
+        Number of entries removed to keep the cache size bounded.
+
+    """
+
+    def __init__(self, path: str, table: str = 'cache', ttl: float = None, max_entries: int = None):
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__lock = Lock()
+        self.__db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.__db.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                          f"(key TEXT PRIMARY KEY, value TEXT, stored REAL, accessed REAL)")
+        self.__db.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+        self.__size = self.__db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def __len__(self):
+        return self.__size
+
+    def get(self, key: str):
+        """Returns the value stored for a key, or None if there isn't a fresh entry for it."""
+
+        now = time()
+
+        with self.__lock:
+            row = self.__db.execute(f"SELECT value, stored FROM {self.table} WHERE key = ?", (key,)).fetchone()
+
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self.__db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.__size -= 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.__db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        """Stores a value, replacing the previous one for the same key."""
+
+        now = time()
+
+        with self.__lock:
+            exists = self.__db.execute(f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)).fetchone() is not None
+            self.__db.execute(f"INSERT OR REPLACE INTO {self.table} (key, value, stored, accessed) VALUES (?, ?, ?, ?)",
+                              (key, json.dumps(value), now, now))
+
+            if not exists:
+                self.__size += 1
+
+            if self.max_entries is not None and self.__size > self.max_entries:
+                excess = self.__size - self.max_entries
+                self.__db.execute(f"DELETE FROM {self.table} WHERE key IN "
+                                  f"(SELECT key FROM {self.table} ORDER BY accessed LIMIT ?)", (excess,))
+                self.__size -= excess
+                self.evictions += excess
+
+    def stats(self) -> dict:
+        return {'entries': self.__size, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__db.close()
@@ -0,0 +1,64 @@
+from threading import Lock
+from time import monotonic, sleep
+
+
+class SystemClock:
+    """
+    The real clock: the monotonic time of the system, and sleeps that block the calling thread.
+
+    Every component that measures or waits for time (Timer, Requestmeter, RateLimiter, ...) takes a clock, this one by
+    default, so it can run on a VirtualClock instead.
+
+    """
+
+    now = staticmethod(monotonic)
+    sleep = staticmethod(sleep)
+
+
+class VirtualClock:
+    """
+    A clock that only moves when it's told to, so hours of requests can be simulated in a few milliseconds.
+
+    A sleep returns at once, moving the clock forward by the seconds slept, so the components that wait for the speed
+    limits run unchanged on virtual time.
+
+    Attributes
+    ----------
+    time : float
+        The current time of the clock, in seconds.
+
+    slept : float
+        Total seconds slept on the clock.
+
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.time = start
+        self.slept = 0.0
+        self.__lock = Lock()
+
+    def now(self) -> float:
+        return self.time
+
+    def sleep(self, seconds: float) -> None:
+        with self.__lock:
+            self.time += seconds
+            self.slept += seconds
+
+    def advance(self, seconds: float) -> None:
+        """Moves the clock forward without counting it as slept, e.g., the time between two requests."""
+
+        with self.__lock:
+            self.time += seconds
+
+    def set(self, time: float) -> None:
+        """Moves the clock to a given time, which can't be earlier than the current one."""
+
+        with self.__lock:
+            if time < self.time:
+                raise ValueError(f"The clock can't go back from {self.time} to {time}")
+
+            self.time = time
+
+
+SYSTEM_CLOCK = SystemClock()
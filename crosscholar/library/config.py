@@ -1,6 +1,5 @@
 # Python imports
 from pathlib import Path
-from functools import reduce
 
 # Vendor imports
 import toml
@@ -20,12 +19,30 @@ class Configuration:
 
         self.download_dir = self.get_download_dir()
         self.limits = self.get_limits()
+        self.rate_limiter = self.get_rate_limiter()
+        self.hosts = self.get_hosts()
+        self.adaptive = self.get_adaptive()
         self.driver = self.get_driver_dir()
+        self.browser = self.get_browser()
+        self.http = self.get_http()
+        self.cache = self.get_cache()
+        self.matching_engine = self.get_matching_engine()
+        self.scholar = self.get_scholar()
 
         self.crossref = self.__config['crossref']['enabled'] if 'enabled' in self.__config['crossref'] else True
 
         if self.crossref:
             self.crossref_to = self.get_crossref_mail()
+            self.crossref_workers = self.__config['crossref']['workers'] if 'workers' in self.__config['crossref'] \
+                else 4
+            self.crossref_mode = self.get_crossref_mode()
+            self.crossref_author_limit = self.__config['crossref']['author_limit'] \
+                if 'author_limit' in self.__config['crossref'] else 1000
+
+            if self.crossref_mode == 'snapshot':
+                self.crossref_snapshot = self.get_crossref_snapshot()
+                self.crossref_snapshot_k = self.__config['crossref']['snapshot_k'] \
+                    if 'snapshot_k' in self.__config['crossref'] else 20
 
         self.notify = self.__config['notify']['enabled'] if 'enabled' in self.__config['notify'] else False
 
@@ -42,12 +59,114 @@ class Configuration:
 
         return self.__config['driver_dir']
 
+    def get_browser(self):
+        browser = self.__config['browser'] if 'browser' in self.__config else {}
+
+        settings = {
+            'pool_size': browser['pool_size'] if 'pool_size' in browser else 1,
+            'max_uses': browser['max_uses'] if 'max_uses' in browser else 50,  # users processed by a browser
+            'headless': browser['headless'] if 'headless' in browser else False,
+            'block': browser['block'] if 'block' in browser else [],
+            'page_load_strategy': browser['page_load_strategy'] if 'page_load_strategy' in browser else 'normal',
+            'cache_dir': browser['cache_dir'] if 'cache_dir' in browser else None
+        }
+
+        if not all(asset in ('images', 'styles', 'fonts') for asset in settings['block']):
+            raise ConfigurationError("Invalid parameter in toml configuration file: Table 'browser', key 'block' "
+                                     "must be a list of 'images', 'styles' or 'fonts'")
+
+        if settings['page_load_strategy'] not in ('normal', 'eager', 'none'):
+            raise ConfigurationError("Invalid parameter in toml configuration file: Table 'browser', key "
+                                     "'page_load_strategy' must be 'normal', 'eager' or 'none'")
+
+        return settings
+
+    def get_http(self):
+        http = self.__config['http'] if 'http' in self.__config else {}
+
+        timeout = http['timeout'] if 'timeout' in http else [5, 30]  # connect and read timeouts, in seconds
+        if not isinstance(timeout, list):
+            timeout = [timeout, timeout]
+
+        return {
+            'pool_size': http['pool_size'] if 'pool_size' in http else 10,
+            'timeout': tuple(timeout),
+            'headers': http['headers'] if 'headers' in http else {},
+            'retries': http['retries'] if 'retries' in http else 2,
+            'proxies': http['proxies'] if 'proxies' in http else {}  # proxy url by host
+        }
+
+    def get_cache(self):
+        cache = self.__config['cache'] if 'cache' in self.__config else {}
+
+        return {
+            'enabled': cache['enabled'] if 'enabled' in cache else True,
+            'path': cache['path'] if 'path' in cache else self.download_dir + "crosscholar_cache.sqlite",
+            'crossref_ttl': (cache['crossref_ttl'] if 'crossref_ttl' in cache else 30) * 86400,  # days to seconds
+            'wos_ttl': (cache['wos_ttl'] if 'wos_ttl' in cache else 7) * 86400,
+            'max_entries': cache['max_entries'] if 'max_entries' in cache else 100000
+        }
+
+    def get_scholar(self):
+        scholar = self.__config['scholar'] if 'scholar' in self.__config else {}
+        modes = {
+            'profile': scholar['profile'] if 'profile' in scholar else 'browser',
+            'details': scholar['details'] if 'details' in scholar else 'browser',
+            'wos': scholar['wos'] if 'wos' in scholar else 'http'
+        }
+
+        for key, mode in modes.items():
+            if mode not in ('browser', 'http'):
+                raise ConfigurationError(f"Invalid parameter in toml configuration file: Table 'scholar', key '{key}' "
+                                         f"must be 'browser' or 'http'")
+
+        # The details are got by clicking the works in the list shown by the browser, which would be listed twice
+        if modes['profile'] == 'http' and modes['details'] == 'browser':
+            raise ConfigurationError("Invalid parameter in toml configuration file: Table 'scholar', key 'profile' "
+                                     "can't be 'http' when key 'details' is 'browser', the profile is listed in the "
+                                     "browser anyway")
+
+        modes['prefetch'] = scholar['prefetch'] if 'prefetch' in scholar else False
+
+        return modes
+
+    def get_matching_engine(self):
+        matching = self.__config['matching'] if 'matching' in self.__config else {}
+        engine = matching['engine'] if 'engine' in matching else 'difflib'
+
+        if engine not in ('difflib', 'indel'):
+            raise ConfigurationError("Invalid parameter in toml configuration file: Table 'matching', key 'engine' "
+                                     "must be 'difflib' or 'indel'")
+
+        return engine
+
     def get_crossref_mail(self):
         if not ('crossref' in self.__config and 'mail_to' in self.__config['crossref']):
             raise ConfigurationError("Missing parameter in toml configuration file: Table 'crossref', key 'mail_to'")
 
         return self.__config['crossref']['mail_to']
 
+    def get_crossref_mode(self):
+        mode = self.__config['crossref']['mode'] if 'mode' in self.__config['crossref'] else 'title'
+
+        if mode not in ('title', 'author', 'snapshot'):
+            raise ConfigurationError("Invalid parameter in toml configuration file: Table 'crossref', key 'mode' "
+                                     "must be 'title', 'author' or 'snapshot'")
+
+        return mode
+
+    def get_crossref_snapshot(self):
+        if 'snapshot' not in self.__config['crossref']:
+            raise ConfigurationError("Missing parameter in toml configuration file: Table 'crossref', key 'snapshot'")
+
+        # Opening a missing file would create an empty index, and every work would be saved without Crossref data
+        if not Path(self.__config['crossref']['snapshot']).is_file():
+            raise ConfigurationError(f"Invalid parameter in toml configuration file: Table 'crossref', key 'snapshot' "
+                                     f"'{self.__config['crossref']['snapshot']}' isn't a file, build it with "
+                                     f"library/snapshot.py")
+
+        return self.__config['crossref']['snapshot']
+
     def get_notify(self):
         if 'mail_from' not in self.__config['notify']:
             raise ConfigurationError("Missing parameter in toml configuration file: Table 'notify', key 'mail_from'")
@@ -64,12 +183,64 @@ class Configuration:
         return self.__config['notify']['mail_from'], self.__config['notify']['mail_pass'], \
             self.__config['notify']['mail_host'], self.__config['notify']['mail_to']
 
+    def get_hosts(self):
+        hosts = self.__config['hosts'] if 'hosts' in self.__config else {}
+        limits = {}
+
+        for host, table in hosts.items():
+            if 'limits' not in table:
+                raise ConfigurationError(f"Missing parameter in toml configuration file: Table 'hosts.{host}', "
+                                         f"key 'limits'")
+
+            # Checking if limits is a list of three non-zero positive integers
+            if len(table['limits']) != 3 or not all(isinstance(x, int) and x > 0 for x in table['limits']):
+                raise ConfigurationError(f"Invalid parameter in toml configuration file: Table 'hosts.{host}', key "
+                                         f"'limits' must be three integers greater than 0")
+
+            limits[host] = tuple(table['limits'])
+
+        return limits
+
+    def get_adaptive(self):
+        adaptive = self.__config['adaptive'] if 'adaptive' in self.__config else {}
+
+        if not (adaptive['enabled'] if 'enabled' in adaptive else True):
+            return None
+
+        settings = {
+            'decrease': adaptive['decrease'] if 'decrease' in adaptive else 0.5,
+            'increase': adaptive['increase'] if 'increase' in adaptive else 0.1,
+            'period': adaptive['clean_period'] if 'clean_period' in adaptive else 600,  # seconds
+            'minimum': adaptive['min_factor'] if 'min_factor' in adaptive else 0.1,
+            'maximum': adaptive['max_factor'] if 'max_factor' in adaptive else 1.0
+        }
+
+        if not 0 < settings['decrease'] < 1:
+            raise ConfigurationError("Invalid parameter in toml configuration file: Table 'adaptive', key 'decrease' "
+                                     "must be between 0 and 1")
+
+        if not 0 < settings['minimum'] <= settings['maximum']:
+            raise ConfigurationError("Invalid parameter in toml configuration file: Table 'adaptive', keys "
+                                     "'min_factor' and 'max_factor' must be greater than 0, and min_factor can't be "
+                                     "greater than max_factor")
+
+        return settings
+
+    def get_rate_limiter(self):
+        rate_limiter = self.__config['rate_limiter'] if 'rate_limiter' in self.__config else 'sliding-window'
+
+        if rate_limiter not in ('sliding-window', 'token-bucket'):
+            raise ConfigurationError("Invalid parameter in toml configuration file: key 'rate_limiter' must be "
+                                     "'sliding-window' or 'token-bucket'")
+
+        return rate_limiter
+
     def get_limits(self):
         if 'limits' in self.__config:
-            product = reduce(lambda x, y: x*y, self.__config['limits']) == 0
+            limits = self.__config['limits']
 
-            # Checking if limits is a list of non-zero positive integers
-            if not all(isinstance(x, int) for x in self.__config) or product <= 0:
+            # Checking if limits is a list of three non-zero positive integers
+            if len(limits) != 3 or not all(isinstance(x, int) and x > 0 for x in limits):
                 return None
 
             return tuple(self.__config['limits'])
@@ -0,0 +1,106 @@
+from session import HttpSession
+
+# The only Crossref fields read by crf_work_details, requested from the API and stored in the snapshots
+CROSSREF_FIELDS = ('title', 'author', 'DOI', 'volume', 'issue', 'page', 'container-title', 'type')
+
+
+class CrossrefClient:
+    """
+    A minimal client for the Crossref REST API that sends its requests through a shared HttpSession.
+
+    The responses are the decoded JSON documents returned by the API, i.e., the same dictionaries returned by habanero.
+
+    Attributes
+    ----------
+    http : HttpSession
+        The pooled session used to send the requests.
+
+    mailto : str
+        Contact mail sent with each request to get into the Crossref polite pool.
+
+    """
+
+    base_url = "https://api.crossref.org"
+
+    def __init__(self, http: HttpSession, mailto: str = None):
+        self.http = http
+        self.mailto = mailto
+
+    def works(self, **kwargs) -> dict:
+        """Queries the /works route.
+
+        Parameters
+        ----------
+        kwargs
+            Query parameters. As in habanero, the field queries are written with underscores, e.g., `query_title`
+            is sent as `query.title`, the `filter` may be a dict and `select` a list of fields.
+
+        Returns
+        -------
+        dict
+            The JSON response.
+
+        """
+
+        params = {(key.replace('_', '.', 1) if key.startswith('query_') else key): encode(value)
+                  for key, value in kwargs.items() if value is not None}
+
+        if self.mailto is not None:
+            params['mailto'] = self.mailto
+
+        r = self.http.get(f"{self.base_url}/works", params=params)
+        r.raise_for_status()
+
+        return r.json()
+
+    def iter_works(self, limit: int = None, rows: int = 1000, **kwargs):
+        """Iterates over every record returned by a /works query, paginating with deep paging cursors.
+
+        Parameters
+        ----------
+        limit : int
+            Maximum number of records to return. None returns every record matched by the query.
+
+        rows : int
+            Records requested by page, at most 1000.
+
+        kwargs
+            Query parameters, as in `works`.
+
+        Yields
+        ------
+        dict
+            Each record returned by the query.
+
+        """
+
+        cursor = '*'
+        returned = 0
+
+        while cursor is not None:
+            page_rows = rows if limit is None else min(rows, limit - returned)
+            message = self.works(cursor=cursor, rows=page_rows, **kwargs)['message']
+            items = message['items']
+
+            for item in items:
+                yield item
+
+            returned += len(items)
+
+            # An empty page means the cursor has reached the end of the results
+            if not items or (limit is not None and returned >= limit):
+                break
+
+            cursor = message.get('next-cursor')
+
+
+def encode(value) -> str:
+    """Converts the filter dicts and select lists to the comma separated form used by Crossref."""
+
+    if isinstance(value, dict):
+        return ','.join(f"{key}:{item}" for key, item in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return ','.join(value)
+
+    return value
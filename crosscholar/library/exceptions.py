@@ -10,4 +10,10 @@ class KeywordsError(Exception):
 
 class ConfigurationError(Exception):
     def __init__(self, message):
-        Exception.__init__(self, message)
\ No newline at end of file
+        Exception.__init__(self, message)
+
+
+class BlockedError(Exception):
+    def __init__(self, url):
+        Exception.__init__(self, f"Google Scholar blocked the request: {url}")
+        self.url = url
@@ -0,0 +1,130 @@
+# Python imports
+from os import fsync, truncate
+from os.path import exists
+from threading import Lock
+
+COMPLETED = '*'  # the key of the lines that mark a user as completed, and the user of the lines about the files
+
+
+class ProgressJournal:
+    """
+    An append-only record of the progress of a batch, to resume it where it stopped after a crash or a ban.
+
+    Each line is `user id <TAB> work key <TAB> file <TAB> offset`, written after a work has been saved in a file of the
+    batch, where the offset is the size of that file with the work. Every line is flushed to the disk before the next
+    work is saved, so a file is never ahead of the journal by more than a work: when the batch is resumed, each file is
+    truncated to its last offset in the journal, and the works and users journaled are skipped.
+
+    A batch may be written by several workers, each one to its own file (shard), which are merged at the end. The
+    merge of a shard is journaled in a single line, so a shard is never merged twice.
+
+    Attributes
+    ----------
+    path : str
+        The journal file.
+
+    offsets : dict
+        Size of each file of the batch at its last line in the journal. The files are journaled by name.
+
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets = {}
+
+        self.__done = set()  # (user id, work key)
+        self.__completed = set()  # user ids
+        self.__lock = Lock()
+
+        if exists(path):
+            self.__read()
+
+        self.__file = open(path, 'a', encoding='utf-8')
+
+    def done(self, user_id: str, key: str) -> bool:
+        """Tells if a work of a user was saved."""
+
+        with self.__lock:
+            return (user_id, key) in self.__done
+
+    def completed(self, user_id: str) -> bool:
+        """Tells if every work of a user was saved."""
+
+        with self.__lock:
+            return user_id in self.__completed
+
+    def start(self, file: str, offset: int) -> None:
+        """Records the size of a file before any work is saved in it, e.g., after its header."""
+
+        if file not in self.offsets:
+            self.__append(COMPLETED, COMPLETED, file, offset)
+
+    def record(self, user_id: str, key: str, file: str, offset: int) -> None:
+        """Records a work saved in a file."""
+
+        with self.__lock:
+            self.__done.add((user_id, key))
+
+        self.__append(user_id, key, file, offset)
+
+    def complete(self, user_id: str, file: str, offset: int) -> None:
+        """Records that every work of a user was saved."""
+
+        with self.__lock:
+            self.__completed.add(user_id)
+
+        self.__append(user_id, COMPLETED, file, offset)
+
+    def merged(self, shard: str, file: str, offset: int) -> None:
+        """Records that the works of a shard were appended to a file, which has now the given size."""
+
+        self.__append(COMPLETED, shard, file, offset)
+
+        with self.__lock:
+            self.offsets.pop(shard, None)
+
+    def rollback(self, directory: str) -> None:
+        """Truncates each file of the batch to its size in the journal, removing anything written after the last work
+        journaled (e.g., a row cut by a crash)."""
+
+        for name, offset in self.offsets.items():
+            if exists(directory + name):
+                truncate(directory + name, offset)
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def stats(self) -> dict:
+        return {'works': len(self.__done), 'users': len(self.__completed)}
+
+    def __append(self, user_id: str, key: str, file: str, offset: int) -> None:
+        with self.__lock:
+            self.__file.write(f"{user_id}\t{key}\t{file}\t{offset}\n")
+            self.__file.flush()
+            fsync(self.__file.fileno())
+
+            self.offsets[file] = offset
+
+    def __read(self) -> None:
+        valid = 0  # bytes of the complete lines
+
+        with open(self.path, 'rb') as file:
+            for line in file:
+                fields = line.decode('utf-8', errors='replace').rstrip('\n').split('\t')
+
+                # A line cut by the crash ends the journal
+                if not line.endswith(b'\n') or len(fields) != 4 or not fields[3].isdigit():
+                    break
+
+                user_id, key, name, offset = fields
+                if user_id == COMPLETED and key != COMPLETED:
+                    self.offsets.pop(key, None)  # a shard merged
+                elif key == COMPLETED and user_id != COMPLETED:
+                    self.__completed.add(user_id)
+                elif key != COMPLETED:
+                    self.__done.add((user_id, key))
+
+                self.offsets[name] = int(offset)
+                valid += len(line)
+
+        truncate(self.path, valid)
@@ -0,0 +1,67 @@
+# Python imports
+from functools import lru_cache
+from html import unescape
+from re import compile
+
+WHITESPACE = compile(r"\s+")
+RESULT_TAGS = compile(r"\[.*\]")  # tags like [PDF] or [HTML] in the search results
+
+# The only characters kept to compare titles
+TITLE_CHARS = frozenset("0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+                        "áàâäéèêëíìîïóòôöúùûüñçÿæœßÁÀÂÄÉÈËÊÍÎÌÏÓÒÔÖÚÙÛÜÑÇŸÆŒẞ")
+
+
+class _TitleTable(dict):
+    """A translation table that deletes every character not in TITLE_CHARS, filled as new characters are seen."""
+
+    def __missing__(self, code: int):
+        value = code if chr(code) in TITLE_CHARS else None
+        self[code] = value
+        return value
+
+
+TITLE_TABLE = _TitleTable()
+
+
+def clean_whitespace(text: str) -> str:
+    """Replaces any sequence of blanks by a single space and removes the blanks at both ends."""
+
+    return WHITESPACE.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=65536)
+def normalize_title(title: str) -> str:
+    """Lowers a title and removes every character that isn't a letter or a number.
+
+    The result is used to compare titles. It may be empty, e.g., for a title written in another alphabet, so it
+    must not be used as a key: see `title_key`.
+
+    """
+
+    return unescape(title.lower()).translate(TITLE_TABLE)
+
+
+@lru_cache(maxsize=65536)
+def title_key(title: str) -> str:
+    """Lowers a title and collapses its blanks, keeping every other character.
+
+    Unlike `normalize_title`, which drops the characters outside TITLE_CHARS (e.g., a whole Cyrillic or CJK title), two
+    different titles never get the same key, so it's the one used by the caches.
+
+    """
+
+    return clean_whitespace(unescape(title)).lower()
+
+
+@lru_cache(maxsize=65536)
+def normalize_result_title(title: str) -> str:
+    """Normalizes a title from the Google Scholar search results, removing the tags like [PDF]."""
+
+    return RESULT_TAGS.sub('', clean_whitespace(title)).strip().lower()
+
+
+@lru_cache(maxsize=16384)
+def normalize_person_name(name: str) -> str:
+    """Normalizes a person name to compare it: lowered, with single spaces and without HTML entities."""
+
+    return clean_whitespace(unescape(name)).lower()
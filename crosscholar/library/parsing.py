@@ -0,0 +1,79 @@
+# Python imports
+from re import compile
+
+# Vendor imports
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml builds the same trees as html.parser several times faster, but it's optional
+try:
+    import lxml  # noqa: F401
+    BACKEND = 'lxml'
+except ImportError:
+    BACKEND = 'html.parser'
+
+# The only parts of each Google Scholar page read by the parsers
+TARGETS = {
+    'users': SoupStrainer(id=['gsc_sa_ccl', 'gsc_authors_bottom_pag']),  # author search results and pagination
+    'graph': SoupStrainer('div', class_='gsc_md_hist_b'),  # user citations graph
+    'works': SoupStrainer('tbody', id='gsc_a_b'),  # user works list
+    'details': SoupStrainer('div', id='gsc_vcd_table'),  # work details
+    'results': SoupStrainer('div', id='gs_res_ccl_mid'),  # search results
+}
+
+# Signs of the pages that Google Scholar returns instead of the requested one when it blocks the client
+BLOCK_STATUS = {403, 429, 503}
+BLOCK_MARKS = compile(rb'id="gs_captcha_f"|id="captcha-form"|unusual traffic from your computer network')
+
+# The same signs, checked in the page displayed by the browser in a single round trip
+BLOCK_SCRIPT = """
+return location.pathname.indexOf('/sorry/') >= 0 || document.getElementById('gs_captcha_f') !== null ||
+    document.getElementById('captcha-form') !== null ||
+    (document.body !== null && document.body.textContent.indexOf('unusual traffic from your computer') >= 0);
+"""
+
+
+def make_soup(html_, target: str = None, backend: str = None) -> BeautifulSoup:
+    """Parses a Google Scholar page building only the subtree needed by a parser.
+
+    Parameters
+    ----------
+    html_ : str or bytes
+        The page source.
+
+    target : str
+        The part of the page to build: one of the keys of `TARGETS`. None builds the whole document.
+
+    backend : str
+        The BeautifulSoup tree builder. Defaults to lxml if it's installed, html.parser otherwise.
+
+    Returns
+    -------
+    BeautifulSoup
+        The soup with the target subtree.
+
+    """
+
+    return BeautifulSoup(html_, backend if backend is not None else BACKEND,
+                         parse_only=TARGETS[target] if target is not None else None)
+
+
+def blocked(html_, url: str = '', status: int = 200) -> bool:
+    """Tells if a response is a block of Google Scholar (a captcha, a rate limit or a redirection to /sorry/).
+
+    Parameters
+    ----------
+    html_ : str or bytes
+        The page source.
+
+    url : str
+        The final url of the response, after the redirections.
+
+    status : int
+        The HTTP status code of the response.
+
+    """
+
+    if status in BLOCK_STATUS or '/sorry/' in url:
+        return True
+
+    return BLOCK_MARKS.search(html_.encode() if isinstance(html_, str) else html_) is not None
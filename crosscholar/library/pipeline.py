@@ -0,0 +1,170 @@
+# Python imports
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import deepcopy
+from queue import Queue
+from threading import Thread
+from typing import Callable
+
+_CLOSE = object()  # marks the end of the records in the writer queue
+
+
+class _Callback:
+    """A function called by the writer in the place it was put in the queue."""
+
+    def __init__(self, function: Callable):
+        self.function = function
+
+
+class EnrichmentPipeline:
+    """
+    A concurrent stage that enriches records in a thread pool and hands them to a writer.
+
+    The scraper puts the records as soon as they are parsed and continues, while the enrichment (e.g., the Crossref
+    lookups) runs in the pool. A single writer thread receives the enriched records in the same order they were put,
+    so the output file is written by one thread only.
+
+    Attributes
+    ----------
+    enrich : callable
+        Function called with the record and the extra arguments given to `put`. It completes the record in place.
+        If None, the records go directly to the writer.
+
+    write : callable
+        Function called with each enriched record, in order.
+
+    workers : int
+        Maximum number of records being enriched at the same time.
+
+    copy : callable
+        Function called with an enriched record and the extra arguments given to `put_copy`. It returns the record
+        written as a copy. Defaults to a deep copy.
+
+    enriched : int
+        Number of records written.
+
+    """
+
+    def __init__(self, enrich: Callable, write: Callable, workers: int = 4, max_pending: int = None,
+                 copy: Callable = None):
+        self.enrich = enrich
+        self.write = write
+        self.workers = workers
+        self.copy = copy if copy is not None else lambda record, *args: deepcopy(record)
+        self.enriched = 0
+        self.copied = 0
+
+        self.__error = None
+        self.__executor = ThreadPoolExecutor(max_workers=workers) if enrich is not None else None
+
+        # Bounding the records in process stops the scraper when the enrichment falls behind
+        self.__pending = Queue(maxsize=max_pending if max_pending is not None else workers * 4)
+
+        self.__writer = Thread(target=self.__write_loop, daemon=True)
+        self.__writer.start()
+
+    def put(self, record, *args) -> Future:
+        """Sends a record to the enrichment stage.
+
+        Returns
+        -------
+        Future
+            The future of the enriched record.
+
+        """
+
+        if self.__error is not None:
+            raise self.__error
+
+        if self.__executor is not None:
+            future = self.__executor.submit(self.__enrich, record, *args)
+        else:
+            future = Future()
+            future.set_result(record)
+
+        self.__pending.put(future)
+
+        return future
+
+    def put_copy(self, source: Future, *args) -> Future:
+        """Sends a copy of a record already put, which isn't enriched again.
+
+        The copy takes the place of a new record in the writer order: the writer waits for the source record to be
+        enriched and writes the record returned by `copy`.
+
+        Parameters
+        ----------
+        source : Future
+            The future of the enriched record, as returned by `put`.
+
+        Returns
+        -------
+        Future
+            The future of the copy.
+
+        """
+
+        if self.__error is not None:
+            raise self.__error
+
+        future = Future()
+
+        def done(f: Future) -> None:
+            try:
+                future.set_result(self.copy(f.result(), *args))
+            except Exception as err:
+                future.set_exception(err)
+
+        source.add_done_callback(done)
+        self.__pending.put(future)
+        self.copied += 1
+
+        return future
+
+    def put_callback(self, callback: Callable) -> None:
+        """Calls a function from the writer once every record put before has been written (e.g., to mark a user
+        as finished)."""
+
+        if self.__error is not None:
+            raise self.__error
+
+        self.__pending.put(_Callback(callback))
+
+    def close(self) -> None:
+        """Waits until every record has been enriched and written, and releases the threads."""
+
+        self.__pending.put(_CLOSE)
+        self.__writer.join()
+
+        if self.__executor is not None:
+            self.__executor.shutdown()
+
+        if self.__error is not None:
+            raise self.__error
+
+    def stats(self) -> dict:
+        return {'workers': self.workers, 'enriched': self.enriched, 'copied': self.copied}
+
+    def __enrich(self, record, *args):
+        self.enrich(record, *args)
+        return record
+
+    def __write_loop(self) -> None:
+        while True:
+            future = self.__pending.get()
+
+            if future is _CLOSE:
+                break
+
+            # After an error the queue is still drained, so the scraper never blocks in `put`
+            if self.__error is not None:
+                continue
+
+            try:
+                if isinstance(future, _Callback):
+                    future.function()
+                    continue
+
+                self.write(future.result())
+                self.enriched += 1
+            except Exception as err:
+                self.__error = err
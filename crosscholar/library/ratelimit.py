@@ -0,0 +1,468 @@
+from collections import deque
+from threading import Lock
+from typing import Dict, Tuple, Union
+from urllib.parse import urlsplit
+
+from events import Events
+
+from clock import SYSTEM_CLOCK
+
+
+class TokenBucket:
+    """
+    A bucket that refills its tokens continuously at a fixed rate.
+
+    The bucket may go into debt (negative tokens): a permit taken while the bucket is empty is granted in the future,
+    and the debt tells the following callers how long they have to wait.
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of tokens the bucket can hold, i.e., the allowed burst.
+
+    rate : float
+        Tokens added to the bucket per second.
+
+    tokens : float
+        Tokens currently available.
+
+    updated : float
+        The clock time of the last refill.
+
+    """
+
+    def __init__(self, capacity: int, period: float, now: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        """Adds the tokens generated since the last refill, never exceeding the capacity."""
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds to wait until a whole token is available."""
+
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """
+    A blocking token-bucket rate limiter with one bucket by unit of time (second, minute and hour).
+
+    A permit is granted only when every bucket can grant it, so the requests never exceed the rate of any of the speed
+    limits. However, a full bucket grants its whole capacity at once on top of what it refills, so a sliding window can
+    see up to about twice its limit: SlidingWindowLimiter is the one that never exceeds the limits.
+
+    Callers sleep the exact time they have to wait instead of polling, and the limiter can be shared by several threads
+    drawing from the same budget.
+
+    Attributes
+    ----------
+    limits : tuple
+        Maximum number of requests per second, minute and hour, correspondingly.
+
+    buckets : tuple
+        The token buckets for the second, minute and hour limits.
+
+    waited : float
+        Total seconds the callers have been blocked by the limiter.
+
+    requests : int
+        Number of permits granted.
+
+    factor : float
+        Fraction of the limits currently allowed, changed by `scale`. 1 means the limits themselves.
+
+    clock : SystemClock or VirtualClock
+        The clock the buckets are refilled and the callers sleep on.
+
+    """
+
+    periods = (1, 60, 3600)  # seconds in each unit of time
+
+    def __init__(self, limits: Tuple[int, int, int] = None, clock=None):
+        self.limits = tuple(limits) if limits is not None else (2, 9, 540)
+        self.waited = 0.0
+        self.requests = 0
+        self.factor = 1.0
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.__lock = Lock()
+
+        now = self.clock.now()
+        self.buckets = tuple(TokenBucket(limit, period, now) for limit, period in zip(self.limits, self.periods))
+
+    def reserve(self) -> float:
+        """Takes a permit from every bucket and returns the seconds the caller must wait before using it.
+
+        Returns
+        -------
+        float
+            Seconds to wait before sending the request, 0 if the request can be sent right now.
+
+        """
+
+        with self.__lock:
+            now = self.clock.now()
+
+            for bucket in self.buckets:
+                bucket.refill(now)
+
+            delay = max(bucket.delay() for bucket in self.buckets)
+
+            for bucket in self.buckets:
+                bucket.tokens -= 1
+
+            self.waited += delay
+            self.requests += 1
+
+        return delay
+
+    def scale(self, factor: float) -> None:
+        """Changes the rate of every bucket to a fraction of its limit, e.g., 0.5 allows half the requests.
+
+        The burst allowed is scaled too, and the tokens already in the buckets over the new capacity are dropped.
+
+        """
+
+        with self.__lock:
+            now = self.clock.now()
+            self.factor = factor
+
+            for bucket, limit, period in zip(self.buckets, self.limits, self.periods):
+                bucket.refill(now)
+                bucket.capacity = max(1.0, limit * factor)
+                bucket.rate = limit * factor / period
+                bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def acquire(self) -> None:
+        """Blocks the calling thread until it's allowed to send a request."""
+
+        delay = self.reserve()
+        if delay > 0:
+            self.clock.sleep(delay)
+
+    def stats(self) -> dict:
+        return {'limits': self.limits, 'factor': round(self.factor, 3),
+                'rate': tuple(round(limit * self.factor, 2) for limit in self.limits), 'requests': self.requests,
+                'waited': round(self.waited, 3)}
+
+
+class SlidingWindowLimiter:
+    """
+    A blocking rate limiter that checks the sliding windows (the last second, minute and hour) themselves.
+
+    It keeps the times of the last permits granted, and grants the next one as soon as no window would hold more
+    permits than its limit: the same rule the Requestmeter checks, so the limits are never exceeded, at the cost of
+    keeping up to the largest limit of times. Like RateLimiter, callers sleep the exact time they have to wait and the
+    limiter can be shared by several threads.
+
+    Attributes
+    ----------
+    limits : tuple
+        Maximum number of requests per second, minute and hour, correspondingly.
+
+    allowed : tuple
+        Requests currently allowed in each window, the limits scaled by `factor` (at least 1).
+
+    waited : float
+        Total seconds the callers have been blocked by the limiter.
+
+    requests : int
+        Number of permits granted.
+
+    factor : float
+        Fraction of the limits currently allowed, changed by `scale`. 1 means the limits themselves.
+
+    clock : SystemClock or VirtualClock
+        The clock the windows are measured and the callers sleep on.
+
+    """
+
+    periods = (1, 60, 3600)  # seconds in each window
+    margin = 1e-6  # seconds between a permit leaving a window and the next one granted
+
+    def __init__(self, limits: Tuple[int, int, int] = None, clock=None):
+        self.limits = tuple(limits) if limits is not None else (2, 9, 540)
+        self.allowed = self.limits
+        self.waited = 0.0
+        self.requests = 0
+        self.factor = 1.0
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+
+        self.__granted = deque(maxlen=max(self.allowed))  # times of the last permits, older ones are never read
+        self.__lock = Lock()
+
+    def reserve(self) -> float:
+        """Takes a permit and returns the seconds the caller must wait before using it.
+
+        Returns
+        -------
+        float
+            Seconds to wait before sending the request, 0 if the request can be sent right now.
+
+        """
+
+        with self.__lock:
+            now = self.clock.now()
+            granted = self.__granted
+
+            # The permits are granted in order, the new one can't be used before the previous ones
+            at = max(now, granted[-1]) if granted else now
+
+            for allowed, period in zip(self.allowed, self.periods):
+                if len(granted) >= allowed:
+                    at = max(at, granted[-allowed] + period + self.margin)
+
+            granted.append(at)
+
+            delay = at - now
+            self.waited += delay
+            self.requests += 1
+
+        return delay
+
+    def scale(self, factor: float) -> None:
+        """Changes the requests allowed in every window to a fraction of its limit, e.g., 0.5 allows half the
+        requests, rounded down but never below one."""
+
+        with self.__lock:
+            self.factor = factor
+            self.allowed = tuple(max(1, int(limit * factor + 1e-9)) for limit in self.limits)
+            self.__granted = deque(self.__granted, maxlen=max(self.allowed))
+
+    def acquire(self) -> None:
+        """Blocks the calling thread until it's allowed to send a request."""
+
+        delay = self.reserve()
+        if delay > 0:
+            self.clock.sleep(delay)
+
+    def stats(self) -> dict:
+        return {'limits': self.limits, 'factor': round(self.factor, 3), 'rate': self.allowed,
+                'requests': self.requests, 'waited': round(self.waited, 3)}
+
+
+ALGORITHMS = {'token-bucket': RateLimiter, 'sliding-window': SlidingWindowLimiter}
+
+
+class AdaptiveRate:
+    """
+    Adapts the rate of a limiter to the blocks of its host (429 responses, captchas, the "unusual traffic" page).
+
+    It's an AIMD controller: each block multiplies the rate by `decrease`, and after every `period` seconds without
+    blocks, the rate grows by `increase` times the limits, up to `maximum`. The blocks that arrive shortly after a
+    decrease (the requests already in flight) don't decrease the rate again.
+
+    Attributes
+    ----------
+    limiter : RateLimiter or SlidingWindowLimiter
+        The limiter adapted.
+
+    decrease : float
+        Factor applied to the rate on each block.
+
+    increase : float
+        Fraction of the limits added to the rate after each clean period.
+
+    period : float
+        Seconds without blocks before the rate is increased.
+
+    minimum, maximum : float
+        Bounds of the rate, as fractions of the limits.
+
+    hold : float
+        Seconds after a decrease in which the new blocks are ignored.
+
+    blocks : int
+        Number of blocks reported.
+
+    events : Events
+        The event trigger. Contains the event rate_changed, raised with the old factor, the new factor and the reason
+        ('blocked' or 'clean period') each time the rate is changed.
+
+    """
+
+    def __init__(self, limiter: Union[RateLimiter, SlidingWindowLimiter], decrease: float = 0.5,
+                 increase: float = 0.1, period: float = 600, minimum: float = 0.1, maximum: float = 1.0,
+                 hold: float = 60):
+        self.limiter = limiter
+        self.decrease = decrease
+        self.increase = increase
+        self.period = period
+        self.minimum = minimum
+        self.maximum = maximum
+        self.hold = hold
+        self.blocks = 0
+        self.events = Events(('rate_changed',))
+
+        self.__decreased = None  # time of the last decrease
+        self.__clean = limiter.clock.now()  # start of the current period without blocks
+        self.__lock = Lock()
+
+    def blocked(self) -> None:
+        changed = None
+
+        with self.__lock:
+            self.blocks += 1
+            now = self.limiter.clock.now()
+            self.__clean = now
+
+            if self.__decreased is None or now - self.__decreased >= self.hold:
+                self.__decreased = now
+                changed = self.__scale(max(self.minimum, self.limiter.factor * self.decrease))
+
+        # The handlers are called without the lock, they may take their time (e.g., writing a log)
+        if changed is not None:
+            self.events.rate_changed(*changed, 'blocked')
+
+    def succeeded(self) -> None:
+        changed = None
+
+        with self.__lock:
+            now = self.limiter.clock.now()
+
+            if now - self.__clean >= self.period and self.limiter.factor < self.maximum:
+                self.__clean = now
+                changed = self.__scale(min(self.maximum, self.limiter.factor + self.increase))
+
+        if changed is not None:
+            self.events.rate_changed(*changed, 'clean period')
+
+    def stats(self) -> dict:
+        return {'factor': round(self.limiter.factor, 3), 'blocks': self.blocks}
+
+    def __scale(self, factor: float) -> Tuple[float, float]:
+        old = self.limiter.factor
+        self.limiter.scale(factor)
+
+        return old, factor
+
+
+class LimiterRegistry:
+    """
+    The rate limiters by host, so the requests to each host draw from their own budget.
+
+    A host reached through a proxy draws from the budget of the proxy instead, i.e., the limiter registered with the
+    address (host:port) of the proxy, since the proxy is the client seen by the host. The hosts without limits of their
+    own get a limiter with the default limits or, without default limits, aren't limited (their requests are only
+    counted).
+
+    Attributes
+    ----------
+    limits : dict
+        The speed limits by host or proxy address. None stands for the default limits of RateLimiter.
+
+    default : tuple
+        The speed limits of the hosts not in `limits`, None if they aren't limited.
+
+    proxies : dict
+        The proxy url by host, for the hosts reached through a proxy.
+
+    adaptive : dict
+        The parameters of the AdaptiveRate controller of each limiter, None if the rates are fixed.
+
+    clock : SystemClock or VirtualClock
+        The clock of every limiter.
+
+    events : Events
+        The event trigger. Contains the event rate_changed, raised with the budget, the old factor, the new factor and
+        the reason each time an AdaptiveRate controller changes the rate of a budget.
+
+    algorithm : str
+        The limiter of each budget, a key of ALGORITHMS: 'sliding-window' (SlidingWindowLimiter, the default, which
+        never exceeds the limits) or 'token-bucket' (RateLimiter).
+
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, int, int]] = None, default: Tuple[int, int, int] = None,
+                 proxies: Dict[str, str] = None, adaptive: dict = None, clock=None, algorithm: str = 'sliding-window'):
+        self.limits = limits if limits is not None else {}
+        self.default = default
+        self.proxies = proxies if proxies is not None else {}
+        self.adaptive = adaptive
+        self.clock = clock
+        self.algorithm = algorithm
+        self.events = Events(('rate_changed',))
+
+        self.__limiters = {}
+        self.__controllers = {}
+        self.__unlimited = {}  # requests by host not limited
+        self.__lock = Lock()
+
+    def key(self, url: str, proxied: bool = True) -> str:
+        """The name of the budget of a request: the host of the url, or the address of its proxy.
+
+        Parameters
+        ----------
+        url : str
+            The url requested.
+
+        proxied : bool
+            False if the request doesn't go through the proxy of the host, e.g., when it's sent by the browser.
+
+        """
+
+        host = urlsplit(url).hostname
+        if proxied and host in self.proxies:
+            return urlsplit(self.proxies[host]).netloc.rpartition('@')[2]  # without the credentials
+
+        return host
+
+    def limiter(self, url: str, proxied: bool = True) -> Union[RateLimiter, SlidingWindowLimiter]:
+        """The limiter of the budget of a request, None if it isn't limited."""
+
+        key = self.key(url, proxied)
+
+        with self.__lock:
+            if key not in self.__limiters:
+                limiter_class = ALGORITHMS[self.algorithm]
+                if key in self.limits:
+                    self.__limiters[key] = limiter_class(self.limits[key], self.clock)
+                else:
+                    self.__limiters[key] = limiter_class(self.default, self.clock) if self.default is not None else None
+
+                if self.__limiters[key] is not None and self.adaptive is not None:
+                    self.__controllers[key] = AdaptiveRate(self.__limiters[key], **self.adaptive)
+                    self.__controllers[key].events.rate_changed += \
+                        lambda old, new, reason, budget=key: self.events.rate_changed(budget, old, new, reason)
+
+            limiter = self.__limiters[key]
+            if limiter is None:
+                self.__unlimited[key] = self.__unlimited.get(key, 0) + 1
+
+        return limiter
+
+    def acquire(self, url: str, proxied: bool = True) -> None:
+        """Blocks the calling thread until it's allowed to send a request to a url."""
+
+        limiter = self.limiter(url, proxied)
+        if limiter is not None:
+            limiter.acquire()
+
+    def blocked(self, url: str, proxied: bool = True) -> None:
+        """Reports that the host blocked a request, to slow down the requests of its budget."""
+
+        controller = self.__controllers.get(self.key(url, proxied))
+        if controller is not None:
+            controller.blocked()
+
+    def succeeded(self, url: str, proxied: bool = True) -> None:
+        """Reports that the host answered a request, to speed up the requests of its budget after a clean period."""
+
+        controller = self.__controllers.get(self.key(url, proxied))
+        if controller is not None:
+            controller.succeeded()
+
+    def stats(self) -> dict:
+        with self.__lock:
+            stats = {key: {'limits': None, 'requests': requests} for key, requests in self.__unlimited.items()}
+            stats.update({key: limiter.stats() for key, limiter in self.__limiters.items() if limiter is not None})
+
+            for key, controller in self.__controllers.items():
+                stats[key].update(controller.stats())
+
+        return stats
@@ -0,0 +1,85 @@
+# Python imports
+from concurrent.futures import Future
+from threading import Event, Lock
+
+# Crosscholar modules imports
+from normalize import title_key
+
+
+def work_key(work) -> str:
+    """The identity of a work across users: its Google Scholar cluster id (cites=) or, without it, its title.
+
+    The title is only lowered and its blanks collapsed (see `title_key`), so two different titles never share a key.
+
+    """
+
+    return f"id:{work['id']}" if work['id'] else f"title:{title_key(work['gsc_title'])}"
+
+
+class WorkRegistry:
+    """
+    The works processed in a batch, so a work listed by several users (co-authors) is processed only once.
+
+    The first user that lists a work claims it and processes it; the next ones get the future of the enriched work,
+    to write a copy of it related to them. When several users are processed at the same time, a user that finds a work
+    still being processed waits until it's sent to the enrichment stage, so the copy is never queued before the work.
+
+    Attributes
+    ----------
+    shared : int
+        Number of works found already claimed.
+
+    """
+
+    def __init__(self):
+        self.shared = 0
+
+        self.__works = {}  # key: (future of the enriched work, event set when the work is sent to the enrichment)
+        self.__lock = Lock()
+
+    def claim(self, key: str):
+        """Claims a work.
+
+        Returns
+        -------
+        Future
+            The future of the work if it was already claimed, or None if the caller must process it and then call
+            `resolve` (or `fail`).
+
+        """
+
+        with self.__lock:
+            if key not in self.__works:
+                self.__works[key] = (Future(), Event())
+                return None
+
+            self.shared += 1
+            future, sent = self.__works[key]
+
+        sent.wait()
+
+        return future
+
+    def resolve(self, key: str, future: Future) -> None:
+        """Links a claimed work to the future of its enrichment."""
+
+        registered, sent = self.__works[key]
+
+        def done(f: Future) -> None:
+            if f.exception() is not None:
+                registered.set_exception(f.exception())
+            else:
+                registered.set_result(f.result())
+
+        future.add_done_callback(done)
+        sent.set()
+
+    def fail(self, key: str, err: BaseException) -> None:
+        """Releases the users waiting for a claimed work that couldn't be processed."""
+
+        registered, sent = self.__works[key]
+        registered.set_exception(err)
+        sent.set()
+
+    def stats(self) -> dict:
+        return {'works': len(self.__works), 'shared': self.shared}
@@ -0,0 +1,74 @@
+# Python imports
+from urllib.parse import urlsplit
+
+# Vendor imports
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# urllib3 decodes brotli responses only when one of these packages is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class HttpSession:
+    """
+    A connection-pooled HTTP session shared by every fetch that doesn't go through Selenium.
+
+    The connections are kept alive and reused between requests to the same host, so only the first request to a host
+    pays the TCP and TLS handshakes.
+
+    Attributes
+    ----------
+    session : requests.Session
+        The underlying session, with a pooled adapter mounted for http and https.
+
+    timeout : tuple
+        The connect and read timeouts, in seconds, applied to every request that doesn't set its own.
+
+    proxies : dict
+        The proxy url by host, for the hosts that must be reached through a proxy.
+
+    limiters : LimiterRegistry
+        The rate limiters by host. Every request waits for a permit of the limiter of its host before being sent.
+
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: tuple = (5, 30), headers: dict = None, retries: int = 2,
+                 proxies: dict = None, limiters=None):
+        self.timeout = timeout
+        self.proxies = proxies if proxies is not None else {}
+        self.limiters = limiters
+        self.session = requests.Session()
+
+        # Retrying only the connection errors, the status codes are handled by the caller
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(total=retries, connect=retries, read=0, status=0, backoff_factor=0.5))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.session.headers.update({'Accept-Encoding': ACCEPT_ENCODING, 'Connection': 'keep-alive'})
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+
+        proxy = self.proxies.get(urlsplit(url).hostname)
+        if proxy is not None:
+            kwargs.setdefault('proxies', {'http': proxy, 'https': proxy})
+
+        if self.limiters is not None:
+            self.limiters.acquire(url)  # Blocks (without spinning) until the speed limits of the host permit it
+
+        return self.session.get(url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,139 @@
+# Python imports
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Vendor imports (optional)
+try:
+    from rapidfuzz.fuzz import ratio as rapidfuzz_ratio
+except ImportError:
+    rapidfuzz_ratio = None
+
+
+class Similarity:
+    """
+    Base class of the similarity engines used to compare titles and names.
+
+    The engines return a ratio between 0 and 1. When a cutoff is given, the ratio is only computed if the cheap upper
+    bounds can reach it, so most of the pairs that can't match are discarded without comparing them.
+
+    """
+
+    name = None
+
+    def ratio(self, a: str, b: str, cutoff: float = 0.0) -> float:
+        """Computes the similarity between two strings.
+
+        Parameters
+        ----------
+        a, b : str
+            The strings to compare.
+
+        cutoff : float
+            Minimum ratio of interest. If the ratio is lower than this value, 0 is returned.
+
+        Returns
+        -------
+        float
+            The similarity ratio, or 0 if it's lower than the cutoff.
+
+        """
+
+        raise NotImplementedError
+
+    @staticmethod
+    def length_bound(a: str, b: str) -> float:
+        """Upper bound of the ratio given by the lengths: the common characters can't exceed the shortest string."""
+
+        total = len(a) + len(b)
+        return 2.0 * min(len(a), len(b)) / total if total else 1.0
+
+    @staticmethod
+    def count_bound(a: str, b: str) -> float:
+        """Upper bound of the ratio given by the characters shared by both strings, regardless of their order."""
+
+        total = len(a) + len(b)
+        return 2.0 * sum((Counter(a) & Counter(b)).values()) / total if total else 1.0
+
+
+class DifflibSimilarity(Similarity):
+    """
+    The ratio of difflib.SequenceMatcher, i.e., the same values the matchers have always used.
+
+    The length and the character count bounds are checked before the quadratic ratio.
+
+    """
+
+    name = 'difflib'
+
+    def ratio(self, a: str, b: str, cutoff: float = 0.0) -> float:
+        if a == b:
+            return 1.0
+
+        if cutoff > 0 and (self.length_bound(a, b) < cutoff or self.count_bound(a, b) < cutoff):
+            return 0.0
+
+        ratio = SequenceMatcher(None, a, b).ratio()
+
+        return ratio if ratio >= cutoff else 0.0
+
+
+class IndelSimilarity(Similarity):
+    """
+    The normalized indel similarity, 2 * LCS / (len(a) + len(b)), where LCS is the longest common subsequence.
+
+    The LCS is computed with the bit-parallel algorithm of Hyyrö, which takes a few big integer operations by
+    character, or with rapidfuzz when it's installed.
+
+    The matching blocks found by difflib are a common subsequence, so this ratio is never lower than difflib's: every
+    pair accepted by difflib with a threshold is also accepted by this engine.
+
+    """
+
+    name = 'indel'
+
+    def ratio(self, a: str, b: str, cutoff: float = 0.0) -> float:
+        if a == b:
+            return 1.0
+
+        if cutoff > 0 and (self.length_bound(a, b) < cutoff or self.count_bound(a, b) < cutoff):
+            return 0.0
+
+        if rapidfuzz_ratio is not None:
+            ratio = rapidfuzz_ratio(a, b) / 100
+        else:
+            ratio = 2.0 * lcs_length(a, b) / (len(a) + len(b))
+
+        return ratio if ratio >= cutoff else 0.0
+
+
+def lcs_length(a: str, b: str) -> int:
+    """Length of the longest common subsequence, with the bit-parallel algorithm of Hyyrö (2004)."""
+
+    if len(a) < len(b):
+        a, b = b, a
+
+    if not b:
+        return 0
+
+    # A bit mask by character with the positions where it appears in the shortest string
+    masks = {}
+    for index, char in enumerate(b):
+        masks[char] = masks.get(char, 0) | (1 << index)
+
+    full = (1 << len(b)) - 1
+    v = full
+    for char in a:
+        u = v & masks.get(char, 0)
+        v = ((v + u) | (v - u)) & full
+
+    # Each zero bit left in v is a character of the subsequence
+    return len(b) - bin(v).count('1')
+
+
+ENGINES = {engine.name: engine for engine in (DifflibSimilarity, IndelSimilarity)}
+
+
+def similarity_engine(name: str = 'difflib') -> Similarity:
+    """Creates the similarity engine registered with a name: 'difflib' or 'indel'."""
+
+    return ENGINES[name]()
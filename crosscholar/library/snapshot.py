@@ -0,0 +1,181 @@
+# Python imports
+import gzip
+import json
+import sqlite3
+import sys
+from html import unescape
+from os import listdir
+from os.path import isdir, join
+from re import compile
+from threading import Lock
+from typing import Iterable, List
+from unicodedata import combining, normalize
+
+# Crosscholar modules imports
+from crossref import CROSSREF_FIELDS
+
+TOKEN = compile(r"\w+")
+
+
+class CrossrefSnapshot:
+    """
+    An offline index of Crossref records built from a Crossref metadata dump.
+
+    The records are stored in a SQLite database with a full text index over their titles, so the candidates for a
+    title are found in milliseconds without sending any request to Crossref.
+
+    Attributes
+    ----------
+    path : str
+        The SQLite database file of the index.
+
+    max_terms : int
+        Maximum number of title words used to search. The rarest words are chosen, since they are the most selective
+        and the cheapest to look up.
+
+    """
+
+    def __init__(self, path: str, max_terms: int = 8):
+        self.path = path
+        self.max_terms = max_terms
+
+        self.__lock = Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.executescript("""
+            CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, doi TEXT UNIQUE, record TEXT);
+            CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5(
+                title, content='', tokenize='unicode61 remove_diacritics 2');
+            CREATE VIRTUAL TABLE IF NOT EXISTS terms USING fts5vocab(titles, 'row');
+        """)
+
+    def ingest(self, records: Iterable[dict], fields: Iterable[str] = None, batch: int = 10000) -> int:
+        """Adds records to the index. The records already indexed (same DOI) are skipped.
+
+        Parameters
+        ----------
+        records : iterable
+            The Crossref records, as returned by the API.
+
+        fields : iterable
+            The fields of each record to store. None stores the whole record.
+
+        batch : int
+            Number of records inserted by transaction.
+
+        Returns
+        -------
+        int
+            Number of records added.
+
+        """
+
+        fields = tuple(fields) if fields is not None else None
+        added = 0
+
+        with self.__lock:
+            cursor = self.__db.cursor()
+
+            for index, item in enumerate(records, 1):
+                if not item.get('title') or 'DOI' not in item:
+                    continue
+
+                record = {field: item[field] for field in fields if field in item} if fields is not None else item
+                cursor.execute("INSERT OR IGNORE INTO records (doi, record) VALUES (?, ?)",
+                               (item['DOI'].lower(), json.dumps(record)))
+
+                if cursor.rowcount:
+                    cursor.execute("INSERT INTO titles (rowid, title) VALUES (?, ?)",
+                                   (cursor.lastrowid, unescape(item['title'][0])))
+                    added += 1
+
+                if index % batch == 0:
+                    self.__db.commit()
+
+            self.__db.commit()
+
+        return added
+
+    def search(self, title: str, k: int = 20) -> List[dict]:
+        """Finds the records whose titles are the most similar to a title.
+
+        Parameters
+        ----------
+        title : str
+            The title to search.
+
+        k : int
+            Maximum number of records returned.
+
+        Returns
+        -------
+        list
+            The records, from the best to the worst match.
+
+        """
+
+        # The index removes the diacritics from the words, so the query words must be written the same way
+        plain = ''.join(char for char in normalize('NFKD', unescape(title).lower()) if not combining(char))
+        words = set(TOKEN.findall(plain))
+        if not words:
+            return []
+
+        with self.__lock:
+            placeholders = ','.join('?' * len(words))
+            known = self.__db.execute(f"SELECT term FROM terms WHERE term IN ({placeholders}) ORDER BY doc LIMIT ?",
+                                      (*words, self.max_terms)).fetchall()
+
+            if not known:
+                return []
+
+            query = ' OR '.join(f'"{term}"' for term, in known)
+            rows = self.__db.execute("SELECT records.record FROM titles JOIN records ON records.id = titles.rowid "
+                                     "WHERE titles MATCH ? ORDER BY bm25(titles) LIMIT ?", (query, k)).fetchall()
+
+        return [json.loads(record) for record, in rows]
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__db.close()
+
+
+def read_dump(path: str) -> Iterable[dict]:
+    """Reads the records of a Crossref dump.
+
+    Parameters
+    ----------
+    path : str
+        A directory or a file. The files may be JSON documents with an `items` list (the format of the Crossref public
+        data files) or JSON lines with a record by line, and may be gzip compressed.
+
+    Yields
+    ------
+    dict
+        Each record in the dump.
+
+    """
+
+    if isdir(path):
+        for name in sorted(listdir(path)):
+            yield from read_dump(join(path, name))
+        return
+
+    opener = gzip.open if path.endswith('.gz') else open
+
+    with opener(path, 'rt', encoding='utf-8') as file:
+        if '.jsonl' in path:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        elif '.json' in path:
+            yield from json.load(file)['items']
+
+
+if __name__ == '__main__':
+    # Usage: python snapshot.py <index.sqlite> <dump dir or file> [<dump dir or file> ...]
+    snapshot = CrossrefSnapshot(sys.argv[1])
+
+    for dump in sys.argv[2:]:
+        print(f"Ingesting {dump}")
+        print(f"Records added: {snapshot.ingest(read_dump(dump), CROSSREF_FIELDS)}")
+
+    snapshot.close()
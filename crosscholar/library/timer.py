@@ -1,62 +1,70 @@
+from collections import deque
 from events import Events
-from time import sleep
-from threading import Thread
+from threading import Lock, local
 from typing import Tuple
+from weakref import finalize
+
+from clock import SYSTEM_CLOCK
 
 
 class Timer:
     """
-    A timer that counts seconds, minutes and hours and raises a event when a unit time occur.
+    A stopwatch based on a monotonic clock, the one of the system unless another one is given.
+
+    The elapsed time is always computed from the clock when requested, so it never drifts and doesn't need any thread
+    counting the units of time.
 
     Attributes
     ----------
-    alive : bool
-        Causes the timers counts if True or stop if False.
+    clock : SystemClock or VirtualClock
+        The clock read by the timer.
+
+    started : float
+        Clock time when the timer started, None if it has not started yet.
 
-    elapsed_seconds : int
-        Number of seconds elapsed since the timer begun.
+    stopped : float
+        Clock time when the timer stopped, None if it's still running.
 
-    elapsed_minutes: int
-        Number of minutes elapsed since the timer begun.
+    """
 
-    elapsed_hours: int
-        Number of hours elapsed since the timer begun.
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.started = None
+        self.stopped = None
 
-    events: Events
-        The event trigger. Contains the event names on_second, on_minute, on_hour.
+    def start(self) -> None:
+        self.started = self.clock.now()
+        self.stopped = None
 
-    """
+    def stop(self) -> None:
+        self.stopped = self.clock.now()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds elapsed since the timer started, with fractional part."""
 
-    def __init__(self):
-        self.alive = False
-        self.elapsed_seconds = 0
-        self.elapsed_minutes = 0
-        self.elapsed_hours = 0
-        self.events = Events(('on_second', 'on_minute', 'on_hour'))
+        if self.started is None:
+            return 0.0
 
-    def count_seconds(self) -> None:
-        """Raises the on_second event, every second and counts the seconds elapsed."""
+        return (self.stopped if self.stopped is not None else self.clock.now()) - self.started
 
-        while self.alive:
-            sleep(1)  # sleeping the thread a second
-            self.elapsed_seconds += 1  # incrementing elapsed seconds by 1
-            self.events.on_second()  # raising the event
+    @property
+    def elapsed_seconds(self) -> int:
+        """Number of whole seconds elapsed since the timer begun."""
 
-    def count_minutes(self) -> None:
-        """Raises the on_minute event, every minute and counts the minutes elapsed."""
+        return int(self.elapsed)
 
-        while self.alive:
-            sleep(60)  # sleeping the thread a minute
-            self.elapsed_minutes += 1  # incrementing elapsed minutes by 1
-            self.events.on_minute()  # raising the event
+    @property
+    def elapsed_minutes(self) -> int:
+        """Number of whole minutes elapsed since the timer begun."""
 
-    def count_hours(self) -> None:
-        """Raises the on_hour event, every hour and counts the hours elapsed."""
+        return int(self.elapsed // 60)
 
-        while self.alive:
-            sleep(3600)  # sleeping the thread a hour
-            self.elapsed_hours += 1  # incrementing elapsed hours by 1
-            self.events.on_hour()  # raising the event
+    @property
+    def elapsed_hours(self) -> int:
+        """Number of whole hours elapsed since the timer begun."""
+
+        return int(self.elapsed // 3600)
 
 
 def time_units(total_seconds: int) -> Tuple[int, int, int]:
@@ -81,40 +89,52 @@ def time_units(total_seconds: int) -> Tuple[int, int, int]:
     return seconds, minutes, hours
 
 
+class _Owner:
+    """Stored in the thread-local of a thread with a shard, to know when the thread ends."""
+
+
 class Requestmeter:
     """
        This class works like a speedometer for requests. The members declared will calculate the request ratios made
        by unit of time (seconds, minutes, hours).
 
+       The meter can be used from several threads at the same time. Each thread counts its requests in its own shard,
+       a list of their times that only that thread appends to, so counting a request is a single append, without
+       locks or checks. The shards are merged, in time order, into the sliding windows (the last second, minute and
+       hour) only when the meter is read: the windows, the peaks, the total or the summary. The speed limit events
+       are raised by that merge, so they are late by as much as the meter goes unread. When a thread ends, its shard
+       is merged and released.
+
         Attributes
         ----------
         total_requests: int
             Counter of the total requests made.
 
-        requests_by_second: list
-            A two elements list that stores the requests made in each second. It functions like a log that registers
-            the accumulated requests made in the previous second and the differential requests made in the last second.
-
-        requests_by_minute: list
-            A two elements list that stores the requests made in each minute. It functions like a log that registers
-            the accumulated requests made in the previous minute and the differential requests made in the last minute.
-
-        requests_by_hour: list
-            A two elements list that stores the requests made in each hour. It functions like a log that registers
-            the accumulated requests made in the previous hour and the differential requests made in the last hour.
+        peaks: list
+            The maximum number of requests observed inside a sliding second, minute and hour, correspondingly.
 
         events: Events
-            The event trigger. Contains the event names second_speed_limit_exceeded, minute_speed_limit_exceeded,
-            hour_speed_limit_exceeded. Raises the corresponding event each time the speed limit has been exceeded.
+            The event trigger. Contains the event names s_speed_limit_exceeded, m_speed_limit_exceeded,
+            h_speed_limit_exceeded. Raises the corresponding event, with the excess ratio, when a request exceeding the
+            speed limit of a window is merged, i.e., when the meter is read.
 
         timer: Timer
-            The timer that will count each second, minute and hour elapsed.
+            The timer that measures the time elapsed since the meter started.
+
+        clock: SystemClock or VirtualClock
+            The clock that timestamps the requests, shared with the timer.
+
+        reports: dict
+            Components attached to the meter (caches, pools, ...) whose `stats()` are printed in the summary.
 
        Class Attributes
        ----------------
        speed_limits : list
            Maximum number of requests that must be sent per second, minute and hour, correspondingly.
 
+       windows : tuple
+           Length in seconds of the sliding windows: a second, a minute and an hour.
+
         Notes
         -----
         The difference between the terms "by" and "per" used in the members of this class is clearly explained in
@@ -123,83 +143,176 @@ class Requestmeter:
        """
 
     speed_limits = ()  # maximum number of requests per second, minute and hour, correspondingly
+    windows = (1, 60, 3600)
 
-    def __init__(self, limits):
+    def __init__(self, limits, clock=None):
         Requestmeter.speed_limits = limits if limits is not None else (2, 9, 540)
-        self.total_requests = 0
-        self.requests_by_second = [0, 0]
-        self.requests_by_minute = [0, 0]
-        self.requests_by_hour = [0, 0]
+        self.__peaks = [0, 0, 0]
+
+        self.__shards = []
+        self.__merged = 0  # requests already moved from the shards to the windows
+        self.__local = local()
+        self.__recent = (deque(), deque(), deque())  # times of the merged requests inside each window
+        self.__merging = Lock()
 
         self.events = Events(('s_speed_limit_exceeded', 'm_speed_limit_exceeded', 'h_speed_limit_exceeded'))
+        self.__exceeded = (self.events.s_speed_limit_exceeded, self.events.m_speed_limit_exceeded,
+                           self.events.h_speed_limit_exceeded)
 
-        self.timer = Timer()
+        self.clock = clock if clock is not None else SYSTEM_CLOCK
+        self.__now = self.clock.now  # read in each count
 
-        # Event subscriptions
-        self.timer.events.on_second = self.requests_by_second_counter
-        self.timer.events.on_minute = self.requests_by_minute_counter
-        self.timer.events.on_hour = self.requests_by_hour_counter
+        self.timer = Timer(self.clock)
+        self.reports = {}
 
-    def start(self):
-        self.timer.alive = True
-        seconds_thread = Thread(target=self.timer.count_seconds)
-        minutes_thread = Thread(target=self.timer.count_minutes)
-        hours_thread = Thread(target=self.timer.count_hours)
+    @property
+    def total_requests(self) -> int:
+        with self.__merging:
+            return self.__merged + sum(len(shard) for shard in self.__shards)
+
+    @property
+    def peaks(self) -> list:
+        self.__merge()  # the peaks are only updated by the merges
 
-        seconds_thread.setDaemon(True)
-        minutes_thread.setDaemon(True)
-        hours_thread.setDaemon(True)
+        with self.__merging:
+            return list(self.__peaks)
 
-        seconds_thread.start()
-        minutes_thread.start()
-        hours_thread.start()
+    def attach(self, name: str, component) -> None:
+        """Adds the statistics of a component, i.e., any object with a `stats()` method, to the summary."""
+
+        self.reports[name] = component
+
+    def start(self):
+        self.timer.start()
 
     def finish(self):
-        # finishing all 3 threads
-        self.timer.alive = False
+        self.timer.stop()
 
         # returning elapsed time
         return self.timer.elapsed_seconds, self.timer.elapsed_minutes, self.timer.elapsed_hours
 
     def count(self):
-        self.total_requests += 1
+        try:
+            append = self.__local.append
+        except AttributeError:
+            append = self.__new_shard()
+
+        append(self.__now())
+
+    def requests_in_window(self, index: int, now: float = None) -> int:
+        """Counts the requests made inside a sliding window that ends now.
+
+        Parameters
+        ----------
+        index : int
+            The window: 0 for the last second, 1 for the last minute and 2 for the last hour.
+
+        now : float
+            The clock time where the window ends. Defaults to the current time.
+
+        Returns
+        -------
+        int
+            Number of requests made inside the window.
+
+        """
+
+        self.__merge()
+
+        now = self.__now() if now is None else now
+        threshold = now - Requestmeter.windows[index]
+
+        with self.__merging:
+            recent = self.__recent[index]
+            while recent and recent[0] <= threshold:
+                recent.popleft()
+
+            return len(recent)
+
+    # region Window counters
+    def requests_last_second(self):
+        return self.requests_in_window(0)
+
+    def requests_last_minute(self):
+        return self.requests_in_window(1)
+
+    def requests_last_hour(self):
+        return self.requests_in_window(2)
+    # endregion Window counters
 
     # region Speed calculators
     def requests_per_second(self):
-        return sum(self.requests_by_second[:]) / self.timer.elapsed_seconds
+        return self.total_requests / self.timer.elapsed if self.timer.elapsed else 0.0
 
     def requests_per_minute(self):
-        return sum(self.requests_by_minute[:]) / self.timer.elapsed_minutes
+        return self.requests_per_second() * 60
 
     def requests_per_hour(self):
-        return sum(self.requests_by_hour[:]) / self.timer.elapsed_hours
+        return self.requests_per_second() * 3600
     # endregion Speed calculators
 
-    # region Timer event handlers
-    def requests_by_second_counter(self):
-        self.requests_by_second[0] = sum(self.requests_by_second[:])
-        self.requests_by_second[-1] = self.total_requests - self.requests_by_second[0]
-        print("s:", self.requests_by_second[-1])
+    def __new_shard(self):
+        """Creates the shard of the calling thread and returns its bound append, the only thing count() needs."""
+
+        shard = []
+        self.__local.append = shard.append
+
+        # The values of a thread-local are released when their thread ends, and so the shard with them
+        self.__local.owner = _Owner()
+        finalize(self.__local.owner, self.__retire, shard)
+
+        with self.__merging:
+            self.__shards.append(shard)
+
+        return shard.append
+
+    def __retire(self, shard: list) -> None:
+        """Merges the requests of a shard whose thread has ended, and stops merging it."""
+
+        self.__merge()
+
+        with self.__merging:
+            self.__shards = [other for other in self.__shards if other is not shard]
+
+    def __merge(self) -> None:
+        """Moves the requests counted in the shards to the windows, in time order, updating the peaks."""
+
+        exceeded = []
+        with self.__merging:
+            times = []
+            for shard in self.__shards:
+                # The owner thread may append meanwhile: only the requests there when the shard is measured are taken,
+                # and the slice and the deletion are atomic, so none of the new ones is lost
+                taken = len(shard)
+                times.extend(shard[:taken])
+                del shard[:taken]
+                self.__merged += taken
+
+            times.sort()
+
+            # The windows are independent, each one is slid over all the times (with local names, it's the hot loop)
+            for index, limit in enumerate(Requestmeter.speed_limits):
+                recent, window, peak = self.__recent[index], Requestmeter.windows[index], self.__peaks[index]
+                append, popleft = recent.append, recent.popleft
+
+                for now in times:
+                    append(now)
 
-        if self.requests_by_second[-1] > Requestmeter.speed_limits[0]:
-            self.events.s_speed_limit_exceeded((self.requests_by_second[-1] / self.speed_limits[0])-1)
+                    threshold = now - window
+                    while recent[0] <= threshold:
+                        popleft()
 
-    def requests_by_minute_counter(self):
-        self.requests_by_minute[0] = sum(self.requests_by_minute[:])
-        self.requests_by_minute[-1] = self.total_requests - self.requests_by_minute[0]
-        print("m:", self.requests_by_minute[-1])
+                    requests = len(recent)
+                    if requests > peak:
+                        peak = requests
 
-        if self.requests_by_minute[-1] > Requestmeter.speed_limits[1]:
-            self.events.m_speed_limit_exceeded((self.requests_by_minute[-1] / self.speed_limits[1])-1)
+                    if requests > limit:
+                        exceeded.append((index, (requests / limit) - 1))
 
-    def requests_by_hour_counter(self):
-        self.requests_by_hour[0] = sum(self.requests_by_hour[:])
-        self.requests_by_hour[-1] = self.total_requests - self.requests_by_hour[0]
-        print("h:", self.requests_by_hour[-1])
+                self.__peaks[index] = peak
 
-        if self.requests_by_hour[-1] > Requestmeter.speed_limits[2]:
-            self.events.h_speed_limit_exceeded((self.requests_by_hour[-1] / self.speed_limits[2])-1)
-    # endregion Timer event handlers
+        for index, excess in exceeded:
+            self.__exceeded[index](excess)
 
     def summary(self):
         p_seconds, p_minutes, p_hours = time_units(self.timer.elapsed_seconds)
@@ -208,13 +321,13 @@ class Requestmeter:
         print(f"Elapsed time: {self.timer.elapsed_hours} h | {self.timer.elapsed_minutes} m | "
               f"{self.timer.elapsed_seconds} s")
         print(f"Pretty time: {self.timer.elapsed_seconds} s = {p_hours}:{p_minutes}:{p_seconds}")
-        print(f"rps: {self.total_requests/self.timer.elapsed_seconds} requests/second")
+        print(f"rps: {self.requests_per_second()} requests/second")
 
-        print("Requests by second")
-        print(self.requests_by_second)
+        print("Peak requests in a second, minute and hour")
+        print(self.peaks)
 
-        print("Requests by minute")
-        print(self.requests_by_minute)
+        print("Speed limits")
+        print(Requestmeter.speed_limits)
 
-        print("Requests by hour")
-        print(self.requests_by_hour)
+        for name, component in self.reports.items():
+            print(f"{name}: {component.stats()}")
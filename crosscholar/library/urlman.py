@@ -51,7 +51,7 @@ class URLFactory:
 
     @cstart.setter
     def cstart(self, value: int) -> None:
-        self.__keywords = value
+        self.__cstart = value
 
     @property
     def page_size(self) -> int:
@@ -59,7 +59,7 @@ class URLFactory:
 
     @page_size.setter
     def page_size(self, value: int) -> None:
-        self.page_size = value
+        self.__page_size = value
 
     def generate(self):
         if self.type_ == ScholarURLType.BASE:
@@ -0,0 +1,143 @@
+# Python imports
+from threading import Lock
+from time import monotonic, sleep
+from typing import Callable
+
+# Vendor imports
+from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+class rows_more_than:
+    """Condition satisfied when the elements found by a locator are more than a given number."""
+
+    def __init__(self, locator: tuple, count: int):
+        self.locator = locator
+        self.count = count
+
+    def __call__(self, browser):
+        return len(browser.find_elements(*self.locator)) > self.count
+
+
+class element_replaced:
+    """Condition satisfied when an element is present and isn't the previous element found by the same locator.
+
+    The modal windows of Google Scholar reuse their container, so the presence of the content isn't enough to know that
+    the content of a new request has arrived.
+
+    """
+
+    def __init__(self, locator: tuple, previous=None):
+        self.locator = locator
+        self.previous = previous
+
+    def __call__(self, browser):
+        elements = browser.find_elements(*self.locator)
+        if elements and (self.previous is None or elements[0] != self.previous):
+            return elements[0]
+
+        return False
+
+
+class window_closed:
+    """Condition satisfied when the browser has at most a given number of tabs."""
+
+    def __init__(self, count: int = 1):
+        self.count = count
+
+    def __call__(self, browser):
+        return len(browser.window_handles) <= self.count
+
+
+class StageWaits:
+    """
+    Waits for conditions in the browser, with a timeout, recording the time waited by stage.
+
+    Attributes
+    ----------
+    timeout : float
+        Default maximum seconds to wait for a condition.
+
+    poll : float
+        Seconds between two checks of a condition.
+
+    """
+
+    def __init__(self, timeout: float = 10, poll: float = 0.05):
+        self.timeout = timeout
+        self.poll = poll
+
+        self.__stages = {}  # stage: [waits, seconds, max seconds, timeouts]
+        self.__lock = Lock()
+
+    def until(self, browser, stage: str, condition: Callable, timeout: float = None):
+        """Waits until a condition is satisfied, and returns its value.
+
+        Parameters
+        ----------
+        browser : webdriver
+            The browser.
+
+        stage : str
+            Name under which the time waited is recorded.
+
+        condition : callable
+            Function of the browser that returns a true value when the wait is over.
+
+        timeout : float
+            Maximum seconds to wait. Defaults to `timeout`.
+
+        Raises
+        ------
+        TimeoutException
+            If the condition isn't satisfied before the timeout.
+
+        """
+
+        start = monotonic()
+        try:
+            value = WebDriverWait(browser, timeout if timeout is not None else self.timeout, self.poll).until(condition)
+        except TimeoutException:
+            self.record(stage, monotonic() - start, timeout=True)
+            raise
+
+        self.record(stage, monotonic() - start)
+
+        return value
+
+    def click(self, element, stage: str, attempts: int = 20, delay: float = 0.1) -> None:
+        """Clicks an element, retrying while something else covers it (e.g. a modal window that is closing).
+
+        Raises
+        ------
+        ElementClickInterceptedException
+            If the element is still covered after all the attempts.
+
+        """
+
+        start = monotonic()
+        for attempt in range(1, attempts + 1):
+            try:
+                element.click()
+                break
+            except ElementClickInterceptedException:
+                if attempt == attempts:
+                    self.record(stage, monotonic() - start, timeout=True)
+                    raise
+
+                sleep(delay)
+
+        self.record(stage, monotonic() - start)
+
+    def record(self, stage: str, seconds: float, timeout: bool = False) -> None:
+        with self.__lock:
+            waits = self.__stages.setdefault(stage, [0, 0.0, 0.0, 0])
+            waits[0] += 1
+            waits[1] += seconds
+            waits[2] = max(waits[2], seconds)
+            waits[3] += timeout
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {stage: {'waits': count, 'seconds': round(total, 3), 'max': round(longest, 3), 'timeouts': timeouts}
+                    for stage, (count, total, longest, timeouts) in self.__stages.items()}
@@ -101,6 +101,14 @@ class Work:
         # e.g. BibTeX.
         self.citation_data = None
 
+        # The URL of the citation view of the work in Google Scholar.
+        # It's used to get the work details, but it's not exported.
+        self.details_url = None
+
+        # The identity of the work in a batch, to journal it and to share it
+        # between users. It's set by gsc_user_works, and it's not exported.
+        self.key = None
+
     def __getitem__(self, key):
         if key in self.attrs:
             return self.attrs[key][0]
@@ -12,7 +12,7 @@ with open('HISTORY.rst') as history_file:
     history = history_file.read()
 
 requirements = [
-    'Click>=6.0', 'beautifulsoup4', 'requests', 'habanero', 'events', 'selenium', 'toml'
+    'Click>=6.0', 'beautifulsoup4', 'requests', 'events', 'selenium', 'toml'
     # TODO: put package requirements here
 ]
 
@@ -40,6 +40,10 @@ setup(
     },
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'brotli': ['brotli'],
+        'lxml': ['lxml']
+    },
     license="GNU General Public License v3",
     zip_safe=False,
     keywords='crosscholar',
@@ -0,0 +1,98 @@
+"""The persistent cache drops the expired entries and evicts the least recently used ones."""
+
+# Python imports
+import unittest
+from os.path import join
+from tempfile import mkdtemp
+from unittest import mock
+
+# Crosscholar modules imports
+import benchmarks.environment  # noqa: F401 (puts the crosscholar modules in the path)
+from cache import PersistentCache
+
+
+class PersistentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = join(mkdtemp(prefix='crosscholar_test_'), 'cache.sqlite')
+        self.now = 1000.0
+
+        patcher = mock.patch('cache.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cache(self, **kwargs) -> PersistentCache:
+        cache = PersistentCache(self.path, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_values_survive_between_runs(self):
+        cache = self.cache()
+        cache.set('title', {'DOI': '10.1000/1', 'author': ['A', 'B']})
+        cache.close()
+
+        cache = self.cache()
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('title'), {'DOI': '10.1000/1', 'author': ['A', 'B']})
+
+    def test_ttl_expiry(self):
+        cache = self.cache(ttl=60)
+        cache.set('title', 'value')
+
+        self.now += 60
+        self.assertEqual(cache.get('title'), 'value')
+
+        self.now += 1
+        self.assertIsNone(cache.get('title'))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats(), {'entries': 0, 'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_ttl_counts_from_the_last_store(self):
+        cache = self.cache(ttl=60)
+        cache.set('title', 'old')
+
+        self.now += 50
+        cache.set('title', 'new')
+
+        self.now += 50
+        self.assertEqual(cache.get('title'), 'new')
+
+    def test_no_ttl(self):
+        cache = self.cache()
+        cache.set('title', 'value')
+
+        self.now += 10 ** 9
+        self.assertEqual(cache.get('title'), 'value')
+
+    def test_lru_eviction(self):
+        cache = self.cache(max_entries=2)
+        cache.set('a', 1)
+        self.now += 1
+        cache.set('b', 2)
+        self.now += 1
+        cache.get('a')  # now b is the least recently used
+        self.now += 1
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_replacing_doesnt_evict(self):
+        cache = self.cache(max_entries=2)
+        cache.set('a', 1)
+        self.now += 1
+        cache.set('b', 2)
+        self.now += 1
+        cache.set('a', 10)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 10)
+        self.assertEqual(cache.get('b'), 2)
+        self.assertEqual(cache.stats()['evictions'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
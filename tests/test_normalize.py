@@ -0,0 +1,81 @@
+"""The shared normalizers give the same results as the regex chains they replaced in the matchers."""
+
+# Python imports
+import unittest
+from html import unescape
+from re import sub
+
+# Crosscholar modules imports
+import benchmarks.environment  # noqa: F401 (puts the crosscholar modules in the path)
+from normalize import (clean_whitespace, normalize_person_name, normalize_result_title, normalize_title,
+                       title_key)
+
+# The regex chains of the matchers, as they were before library/normalize.py
+TITLE_REGEX = r"[^0-9a-zA-ZáàâäéèêëíìîïóòôöúùûüñçÿæœßÁÀÂÄÉÈËÊÍÎÌÏÓÒÔÖÚÙÛÜÑÇŸÆŒẞ]"
+
+
+def old_clean_title(title):
+    return sub(TITLE_REGEX, '', unescape(title.lower()))
+
+
+def old_clean_whitespace(text):
+    return sub(r"\s", ' ', sub(r"\s+", ' ', text)).strip()
+
+
+def old_search_title(text):
+    return sub(r"\[.*\]", '', old_clean_whitespace(text)).strip().lower()
+
+
+TITLES = [
+    "Energy-related CO2 emissions in Mexico: a decomposition analysis",
+    "  Análisis   de la\tvulnerabilidad\nsísmica de edificios  ",
+    "ÜBER DIE STRAßE: Größe & Maß",
+    "Water &amp; sediment flow in the Río Bravo basin (1990&ndash;2010)",
+    "Steel&nbsp;industry efficiency — a review",
+    "Œuvres complètes, Ÿ, Æ, ẞ",
+    "Сейсмическая оценка зданий",
+    "地震 応答 解析",
+    "",
+    "   ",
+    "[PDF] Urban transport policy",
+    "[HTML][HTML] Solar power systems [CITATION]",
+    "A [B] c",
+    "Ünïcödé 123 ÁÉÍÓÚ ñ ç",
+]
+
+NAMES = ["Claudia Sheinbaum", "José María GARCÍA", "Müller, Wei", "Eric   Smith", "Ana\tLópez", "ẞ Groß"]
+
+
+class NormalizeTest(unittest.TestCase):
+
+    def test_normalize_title(self):
+        for title in TITLES:
+            with self.subTest(title=title):
+                self.assertEqual(normalize_title(title), old_clean_title(title))
+
+    def test_clean_whitespace(self):
+        for title in TITLES:
+            with self.subTest(title=title):
+                self.assertEqual(clean_whitespace(title), old_clean_whitespace(title))
+
+    def test_normalize_result_title(self):
+        for title in TITLES:
+            with self.subTest(title=title):
+                self.assertEqual(normalize_result_title(title), old_search_title(title))
+
+    def test_normalize_person_name(self):
+        for name in NAMES:
+            with self.subTest(name=name):
+                self.assertEqual(normalize_person_name(name), old_clean_whitespace(name).lower())
+
+        # The Crossref names get the entity handling of the Scholar names now
+        self.assertEqual(normalize_person_name("Jos&eacute; P&eacute;rez"), "josé pérez")
+
+    def test_title_key_keeps_other_alphabets(self):
+        self.assertEqual(normalize_title(TITLES[6]), normalize_title(TITLES[7]))  # both empty
+        self.assertNotEqual(title_key(TITLES[6]), title_key(TITLES[7]))
+        self.assertEqual(title_key("  Energy\tPolicy &amp; Climate "), "energy policy & climate")
+
+
+if __name__ == '__main__':
+    unittest.main()
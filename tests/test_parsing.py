@@ -0,0 +1,58 @@
+"""The restricted lxml soups parse the pages of the corpus the same as the whole documents built by html.parser."""
+
+# Python imports
+import io
+import unittest
+from contextlib import redirect_stdout
+
+# Crosscholar modules imports
+from benchmarks.parsers import cc, parse, read_corpus
+from parsing import BACKEND
+
+
+def plain(value):
+    """The fields of the parsed users and works, to compare the outputs of the parsers."""
+
+    if isinstance(value, cc.URLFactory):
+        return value.url
+
+    if isinstance(value, (cc.User, cc.Work)):
+        fields = {key: plain(item[0]) for key, item in value.attrs.items()}
+        fields['details_url'] = getattr(value, 'details_url', None)
+        return fields
+
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+
+    return value
+
+
+@unittest.skipUnless(BACKEND == 'lxml', "lxml isn't installed")
+class ParsingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = read_corpus()
+
+    def test_restricted_soups_parse_the_same(self):
+        for name, page in self.corpus.items():
+            for parser in page['parsers']:
+                with self.subTest(page=name, parser=parser), redirect_stdout(io.StringIO()):
+                    restricted = plain(parse(parser, page))
+                    full = plain(parse(parser, page, full=True))
+
+                    self.assertTrue(restricted)
+                    self.assertEqual(restricted, full)
+
+    def test_all_the_works_are_parsed(self):
+        for name, page in self.corpus.items():
+            if 'gsc_works' in page['parsers']:
+                with self.subTest(page=name), redirect_stdout(io.StringIO()):
+                    self.assertEqual(len(parse('gsc_works', page)), page['works'])
+
+
+if __name__ == '__main__':
+    unittest.main()
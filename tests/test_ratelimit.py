@@ -0,0 +1,165 @@
+"""The limiters never exceed the speed limits, and the adaptive rate follows the blocks of the host."""
+
+# Python imports
+import unittest
+from bisect import bisect_right
+
+# Crosscholar modules imports
+from benchmarks.environment import load_crosscholar
+from benchmarks.simulate import TRACES
+from clock import VirtualClock
+from ratelimit import AdaptiveRate, LimiterRegistry, RateLimiter, SlidingWindowLimiter
+
+crosscholar = load_crosscholar()
+
+LIMITS = (2, 9, 540)
+PERIODS = (1, 60, 3600)
+
+
+def send(limiter_class, trace, limits=LIMITS):
+    """Replays a trace, in milliseconds, through a limiter on a virtual clock and returns when each request is sent."""
+
+    clock = VirtualClock()
+    limiter = limiter_class(limits, clock)
+
+    sent = []
+    for wanted in trace:
+        clock.set(max(clock.time, wanted / 1000))
+        sent.append(clock.time + limiter.reserve())
+
+    return sorted(sent)
+
+
+def peaks(sent):
+    """The most requests sent inside a sliding second, minute and hour (a window ends at each request)."""
+
+    return [max(index + 1 - bisect_right(sent, time - period) for index, time in enumerate(sent))
+            for period in PERIODS]
+
+
+class SlidingWindowTest(unittest.TestCase):
+
+    def test_never_exceeds_the_limits(self):
+        for name, trace in TRACES.items():
+            with self.subTest(trace=name):
+                for peak, limit in zip(peaks(send(SlidingWindowLimiter, trace(0))), LIMITS):
+                    self.assertLessEqual(peak, limit)
+
+    def test_token_bucket_exceeds_the_limits(self):
+        # The bursts the sliding windows prevent
+        self.assertTrue(any(peak > limit for peak, limit in zip(peaks(send(RateLimiter, TRACES['burst'](0))), LIMITS)))
+
+    def test_sends_as_soon_as_allowed(self):
+        sent = send(SlidingWindowLimiter, [0] * 20)
+
+        self.assertEqual(sent[:2], [0, 0])
+        self.assertAlmostEqual(sent[2], 1, places=3)  # the second is full
+        self.assertAlmostEqual(sent[9], 60, places=3)  # the minute is full
+
+    def test_scaled_limits(self):
+        clock = VirtualClock()
+        limiter = SlidingWindowLimiter(LIMITS, clock)
+        limiter.scale(0.5)
+
+        sent = []
+        for _ in range(30):
+            sent.append(clock.time + limiter.reserve())
+
+        self.assertEqual(limiter.allowed, (1, 4, 270))
+        for peak, allowed in zip(peaks(sent), limiter.allowed):
+            self.assertLessEqual(peak, allowed)
+
+    def test_sliding_window_is_the_default(self):
+        self.assertIsInstance(LimiterRegistry({'example.org': LIMITS}).limiter('https://example.org/'),
+                              SlidingWindowLimiter)
+        self.assertEqual(crosscholar.config.rate_limiter, 'sliding-window')
+        self.assertIsInstance(crosscholar.limiters.limiter(crosscholar.ScholarURLType.BASE.value),
+                              SlidingWindowLimiter)
+
+    def test_token_bucket_can_be_chosen(self):
+        registry = LimiterRegistry({'example.org': LIMITS}, algorithm='token-bucket')
+
+        self.assertIsInstance(registry.limiter('https://example.org/'), RateLimiter)
+
+
+class AdaptiveRateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.limiter = SlidingWindowLimiter(LIMITS, self.clock)
+        self.adaptive = AdaptiveRate(self.limiter, decrease=0.5, increase=0.1, period=600, minimum=0.1, maximum=1.0,
+                                     hold=60)
+
+        self.changes = []
+        self.adaptive.events.rate_changed += lambda old, new, reason: self.changes.append((old, new, reason))
+
+    def test_decrease_on_block(self):
+        self.adaptive.blocked()
+
+        self.assertEqual(self.limiter.factor, 0.5)
+        self.assertEqual(self.limiter.allowed, (1, 4, 270))
+        self.assertEqual(self.changes, [(1.0, 0.5, 'blocked')])
+
+    def test_hold_after_decrease(self):
+        self.adaptive.blocked()
+        self.clock.advance(30)
+        self.adaptive.blocked()  # a request already in flight
+
+        self.assertEqual(self.limiter.factor, 0.5)
+
+        self.clock.advance(30)
+        self.adaptive.blocked()
+
+        self.assertEqual(self.limiter.factor, 0.25)
+        self.assertEqual(self.adaptive.blocks, 3)
+        self.assertEqual(len(self.changes), 2)
+
+    def test_minimum(self):
+        for _ in range(10):
+            self.adaptive.blocked()
+            self.clock.advance(60)
+
+        self.assertEqual(self.limiter.factor, 0.1)
+
+    def test_increase_after_clean_period(self):
+        self.adaptive.blocked()
+
+        self.clock.advance(599)
+        self.adaptive.succeeded()
+        self.assertEqual(self.limiter.factor, 0.5)
+
+        self.clock.advance(1)
+        self.adaptive.succeeded()
+        self.assertAlmostEqual(self.limiter.factor, 0.6)
+        self.assertEqual(self.changes[-1][2], 'clean period')
+
+        self.clock.advance(1)
+        self.adaptive.succeeded()  # the next period starts with the increase
+        self.assertAlmostEqual(self.limiter.factor, 0.6)
+
+    def test_block_restarts_the_clean_period(self):
+        self.adaptive.blocked()
+        self.clock.advance(30)
+        self.adaptive.blocked()  # held, but the period without blocks starts again
+        self.clock.advance(590)
+        self.adaptive.succeeded()
+
+        self.assertEqual(self.limiter.factor, 0.5)
+
+        self.clock.advance(10)
+        self.adaptive.succeeded()
+
+        self.assertAlmostEqual(self.limiter.factor, 0.6)
+
+    def test_maximum(self):
+        self.adaptive.blocked()
+        for _ in range(10):
+            self.clock.advance(600)
+            self.adaptive.succeeded()
+
+        self.assertEqual(self.limiter.factor, 1.0)
+        self.assertEqual(self.adaptive.stats(), {'factor': 1.0, 'blocks': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
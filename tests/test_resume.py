@@ -0,0 +1,120 @@
+"""Batches stopped by a crash are resumed without losing or duplicating works."""
+
+# Python imports
+import io
+import unittest
+from contextlib import redirect_stdout
+from os import listdir, remove
+from threading import Lock
+from unittest import mock
+
+# Crosscholar modules imports
+from benchmarks.environment import load_crosscholar
+
+crosscholar = load_crosscholar()
+
+USERS = 6
+WORKS = 3  # by user
+
+
+class FakeBrowser:
+    """Just enough of a browser for the pool: no work is requested through it."""
+
+    window_handles = ['main']
+
+    class switch_to:
+        @staticmethod
+        def window(handle):
+            pass
+
+    def get(self, url):
+        pass
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        pass
+
+
+class ResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = crosscholar.config.download_dir
+        for name in listdir(self.directory):
+            if name.startswith(('users_batch_', 'works_batch_')):
+                remove(self.directory + name)
+
+        self.users_batch = self.directory + "users_batch_181009_021134.csv"
+        with open(self.users_batch, 'w', encoding='utf8') as file:
+            file.write("id|name|page|avatar|affiliation|citations_count\n")
+            for index in range(USERS):
+                file.write(f"U{index}|User {index}|{crosscholar.ScholarURLType.BASE.value}/citations?user=U{index}"
+                           f"|avatar|affiliation|0\n")
+
+        self.works_batch = self.directory + "works_batch_181009_021134_full.csv"
+        self.searches = 0
+        self.crash_at = None
+        self.lock = Lock()
+
+    def user_works(self, user, browser=None):
+        for index in range(WORKS):
+            work = crosscholar.Work()
+            work['user_id'] = user['id']
+            work['id'] = f"{user['id']}-{index}"
+            work['gsc_title'] = f"Work {index} of {user['id']}"
+            yield work
+
+    def wos_citations(self, browser, work):
+        with self.lock:
+            self.searches += 1
+            if self.searches == self.crash_at:
+                raise RuntimeError("Blocked")
+
+        work['wos_citations_count'] = 0
+
+    def download(self, workers: int, crash_at: int = None) -> None:
+        self.searches = 0
+        self.crash_at = crash_at
+
+        with mock.patch.object(crosscholar, 'user_works', self.user_works), \
+                mock.patch.object(crosscholar, 'gsc_work_wos_citations', self.wos_citations), \
+                mock.patch.object(crosscholar, 'work_details_http_request', lambda work: None), \
+                mock.patch.object(crosscholar, 'new_browser', FakeBrowser), \
+                mock.patch.dict(crosscholar.config.scholar, {'details': 'http'}), \
+                redirect_stdout(io.StringIO()):
+            crosscholar.download_works(self.users_batch, workers=workers)
+
+    def assertComplete(self):
+        with open(self.works_batch, encoding='utf8') as file:
+            rows = file.read().splitlines()[1:]
+
+        self.assertEqual(len(rows), USERS * WORKS)
+        self.assertEqual(len(set(rows)), USERS * WORKS)
+        self.assertEqual([name for name in listdir(self.directory) if '_w' in name], [])
+
+    def resume(self, crashed_workers: int, workers: int) -> None:
+        with self.assertRaises(RuntimeError):
+            self.download(crashed_workers, crash_at=10)
+
+        self.download(workers)
+        self.assertComplete()
+
+    def test_resume(self):
+        self.resume(1, 1)
+
+    def test_resume_parallel(self):
+        self.resume(2, 2)
+
+    def test_resume_fewer_workers(self):
+        self.resume(2, 1)
+
+    def test_resume_more_workers(self):
+        self.resume(1, 3)
+
+    def test_resume_other_workers(self):
+        self.resume(3, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()